@@ -0,0 +1,49 @@
+"""
+Shared setup for the benchmark scripts.
+
+Benchmarks run against a throwaway SQLite file so they never touch the
+development database. Run them from the project root, e.g.
+``python -m benchmarks.bench_write_behind``.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup_django(**overrides):
+    """Configure Django against a fresh, migrated SQLite file."""
+    sys.path.insert(0, str(PROJECT_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'todoproject.settings')
+
+    import django
+    from django.conf import settings
+    from django.core.management import call_command
+
+    tmp_dir = tempfile.mkdtemp(prefix='todo-bench-')
+    settings.DATABASES['default']['NAME'] = os.path.join(tmp_dir, 'bench.sqlite3')
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+    django.setup()
+    call_command('migrate', verbosity=0)
+    return tmp_dir
+
+
+def teardown_django(tmp_dir):
+    from django.db import connections
+    connections.close_all()
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def report(title, rows):
+    """Print ``rows`` of (label, value) pairs as an aligned table."""
+    print(title)
+    print('=' * len(title))
+    width = max(len(label) for label, value in rows)
+    for label, value in rows:
+        print(f'{label:<{width}}  {value}')
+    print()
@@ -0,0 +1,58 @@
+"""
+Rows/sec for the bulk importer as the number of parser processes grows.
+
+Generates a JSON Lines dump, then imports it into a fresh table with 1, 2,
+4, ... worker processes up to the number of CPUs.
+
+    python -m benchmarks.bench_import [rows]
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+
+from benchmarks._common import report, setup_django, teardown_django
+
+
+def write_dump(path, rows):
+    words = 'buy milk call mom fix bug write report plan sprint review code water plants'.split()
+    rng = random.Random(0)
+    with open(path, 'w', encoding='utf-8') as handle:
+        for i in range(rows):
+            handle.write(json.dumps({
+                'title': ' '.join(rng.choices(words, k=4)) + f' #{i}',
+                'description': ' '.join(rng.choices(words, k=30)),
+                'completed': rng.choice(['true', 'false']),
+                'due_at': f'2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T09:00',
+                'priority': rng.randint(1, 4),
+            }) + '\n')
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    tmp_dir = setup_django()
+    try:
+        from django.core.management import call_command
+        from todo.importer import import_todos
+
+        dump = os.path.join(tempfile.mkdtemp(dir=tmp_dir), 'todos.jsonl')
+        write_dump(dump, rows)
+        counts, workers = [], 1
+        while workers <= (os.cpu_count() or 1):
+            counts.append(workers)
+            workers *= 2
+        results = []
+        for workers in counts:
+            # Start every run from empty todo and history tables.
+            call_command('flush', interactive=False, verbosity=0)
+            result = import_todos(dump, workers=workers, chunk_bytes=1024 * 1024)
+            results.append((f'{workers} worker(s)', f'{result.imported / result.elapsed:>10.0f} rows/sec  ({result.elapsed:.2f}s)'))
+        report(f'Bulk import of {rows} rows (JSON Lines, SQLite file)', results)
+    finally:
+        teardown_django(tmp_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Peak memory of rendering the full todo list from model instances versus
+lightweight TodoRow objects with a database-truncated description.
+
+    python -m benchmarks.bench_read_model [items] [description_chars]
+
+Each mode renders the list page once, unpaginated, in its own child
+process, so that its peak RSS is not hidden by the other's.
+"""
+
+import os
+import resource
+import subprocess
+import sys
+import time
+
+from benchmarks._common import PROJECT_DIR, report, setup_django, teardown_django
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS.
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def fill(TodoItem, items, description_chars):
+    words = ('lorem ipsum dolor sit amet ' * (description_chars // 27 + 1))[:description_chars]
+    for start in range(0, items, 5000):
+        TodoItem.objects.bulk_create(
+            [TodoItem(title=f'Todo {i}', description=words) for i in range(start, min(start + 5000, items))],
+            batch_size=500,
+        )
+
+
+def render(db_path, use_rows):
+    """Render the list page against ``db_path`` and print the measurements."""
+    sys.path.insert(0, str(PROJECT_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'todoproject.settings')
+
+    import django
+    from django.conf import settings
+
+    settings.DATABASES['default']['NAME'] = db_path
+    settings.TODO_LIST_ROWS = use_rows
+    settings.TODO_LIST_PAGE_SIZE = None
+    settings.TODO_COALESCE_LIST_REQUESTS = False
+    settings.DEBUG = False
+    django.setup()
+
+    from django.test import RequestFactory
+    from todo.views import TodoListView
+
+    view = TodoListView.as_view()
+    # Warm up templates and connections on an empty page first.
+    view(RequestFactory().get('/', {'after': '0-0'})).render()
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    response = view(RequestFactory().get('/'))
+    response.render()
+    elapsed = time.perf_counter() - start
+    print(baseline, peak_rss_mb(), elapsed, len(response.content))
+
+
+def measure(db_path, use_rows):
+    output = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.bench_read_model', '--render', db_path, str(int(use_rows))],
+        cwd=PROJECT_DIR, check=True, capture_output=True, text=True,
+    ).stdout
+    baseline, peak, elapsed, size = output.split()
+    return float(baseline), float(peak), float(elapsed), int(size)
+
+
+def main():
+    if sys.argv[1:2] == ['--render']:
+        render(sys.argv[2], sys.argv[3] == '1')
+        return
+    items = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    description_chars = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    tmp_dir = setup_django()
+    try:
+        from django.conf import settings
+        from django.db import connections
+        from todo.models import TodoItem
+
+        fill(TodoItem, items, description_chars)
+        connections.close_all()
+        db_path = settings.DATABASES['default']['NAME']
+        rows = []
+        for label, use_rows in (('model instances', False), ('TodoRow rows', True)):
+            baseline, peak, elapsed, size = measure(db_path, use_rows)
+            rows.append((label, f'peak RSS {peak:8.1f} MB  (+{peak - baseline:7.1f} MB)  '
+                                f'{elapsed * 1000:8.0f} ms  {size / 1e6:6.1f} MB of HTML'))
+        report(f'Rendering {items} todos with {description_chars}-character descriptions', rows)
+    finally:
+        teardown_django(tmp_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Bytes on the wire and CPU cost per request for the todo list page with
+the response pipeline (minification and compression) switched on and off.
+
+    python -m benchmarks.bench_response_pipeline [items] [requests]
+"""
+
+import sys
+import time
+
+from benchmarks._common import report, setup_django, teardown_django
+
+CONFIGS = [
+    ('raw', False, ''),
+    ('minified', True, ''),
+    ('minified + gzip', True, 'gzip'),
+    ('minified + br', True, 'br, gzip'),
+    ('raw + gzip', False, 'gzip'),
+]
+
+
+def measure(client, url, requests, minify, accept_encoding):
+    from django.test import override_settings
+
+    with override_settings(TODO_MINIFY_HTML=minify):
+        client.get(url, HTTP_ACCEPT_ENCODING=accept_encoding)
+        start = time.process_time()
+        for _ in range(requests):
+            response = client.get(url, HTTP_ACCEPT_ENCODING=accept_encoding)
+            if response.streaming:
+                size = sum(len(chunk) for chunk in response.streaming_content)
+            else:
+                size = len(response.content)
+        cpu = (time.process_time() - start) / requests
+    return size, response.get('Content-Encoding', 'identity'), cpu
+
+
+def main():
+    items = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    tmp_dir = setup_django(TODO_LIST_PAGE_SIZE=None)
+    try:
+        from django.test import Client
+        from django.urls import reverse
+        from todo.models import TodoItem
+
+        TodoItem.objects.bulk_create(
+            TodoItem(title=f'Todo {i}', description='Some words about this todo ' * 4, completed=i % 3 == 0)
+            for i in range(items)
+        )
+        client = Client()
+        url = reverse('todo:todo_list')
+        rows = []
+        for label, minify, accept_encoding in CONFIGS:
+            size, encoding, cpu = measure(client, url, requests, minify, accept_encoding)
+            rows.append((label, f'{size:>9,} bytes  {encoding:<8}  {cpu * 1000:7.2f} ms CPU/request'))
+        report(f'Todo list page ({items} items, {requests} requests each)', rows)
+    finally:
+        teardown_django(tmp_dir)
+
+
+if __name__ == '__main__':
+    main()
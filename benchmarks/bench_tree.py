@@ -0,0 +1,78 @@
+"""
+Subtree fetch with completion rollups: one materialized-path range query
+versus recursive per-node child lookups, on trees of different shapes.
+
+    python -m benchmarks.bench_tree [nodes]
+
+The deep chain is capped at 1,000 levels: path length grows with depth, so
+a chain's total path storage is quadratic in its length.
+"""
+
+import sys
+import time
+
+from benchmarks._common import report, setup_django, teardown_django
+
+
+def build(TodoItem, shape, nodes):
+    root = TodoItem.objects.create(title=f'{shape} root')
+    level, created = [root], 1
+    while created < nodes:
+        fanout = {'wide': nodes, 'balanced': 10, 'deep': 1}[shape]
+        batch = []
+        for parent in level:
+            for i in range(min(fanout, nodes - created - len(batch))):
+                batch.append(TodoItem(title=f'{shape} node', parent=parent, completed=i % 3 == 0))
+        level = TodoItem.objects.bulk_create(batch, batch_size=500)
+        created += len(batch)
+    return root
+
+
+def recursive_rollup(TodoItem, node):
+    total = done = 0
+    for child in TodoItem.objects.filter(parent=node):
+        child_total, child_done = recursive_rollup(TodoItem, child)
+        total += child_total + 1
+        done += child_done + int(child.completed)
+    return total, done
+
+
+def timed(func):
+    from django.db import connection
+
+    queries = []
+
+    def count(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(count):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+    return result, elapsed, len(queries)
+
+
+def main():
+    nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    tmp_dir = setup_django()
+    try:
+        from todo.models import TodoItem
+        from todo.tree import rollup
+
+        sys.setrecursionlimit(10000)
+        rows = []
+        for shape, size in (('wide', nodes), ('balanced', nodes), ('deep', min(nodes, 1000))):
+            root = build(TodoItem, shape, size)
+            subtree, path_time, path_queries = timed(lambda: rollup(list(TodoItem.objects.subtree(root))))
+            (total, done), naive_time, naive_queries = timed(lambda: recursive_rollup(TodoItem, root))
+            assert (subtree[0].subtask_count, subtree[0].subtasks_done) == (total, done)
+            rows.append((f'{shape} ({size} nodes) path range', f'{path_time * 1000:9.1f} ms  {path_queries:6d} queries'))
+            rows.append((f'{shape} ({size} nodes) recursive', f'{naive_time * 1000:9.1f} ms  {naive_queries:6d} queries'))
+        report('Subtree fetch with completion rollups', rows)
+    finally:
+        teardown_django(tmp_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Inserts/sec for todo creation with and without write-behind batching.
+
+Every direct create runs in its own autocommit transaction, as a POST to
+AddTodoView does; the batched run submits the same rows to a
+WriteBehindQueue and waits for the final flush.
+
+    python -m benchmarks.bench_write_behind [count]
+"""
+
+import sys
+import time
+
+from benchmarks._common import report, setup_django, teardown_django
+
+
+def bench_direct(TodoItem, count):
+    start = time.perf_counter()
+    for i in range(count):
+        TodoItem.objects.create(title=f'Direct {i}')
+    return time.perf_counter() - start
+
+
+def bench_batched(TodoItem, count, batch_size):
+    from todo.batching import WriteBehindQueue
+
+    write_behind = WriteBehindQueue(TodoItem, batch_size=batch_size, flush_interval=0.05).start()
+    start = time.perf_counter()
+    for i in range(count):
+        write_behind.submit(TodoItem(title=f'Batched {i}'))
+    write_behind.flush()
+    elapsed = time.perf_counter() - start
+    write_behind.stop()
+    return elapsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    tmp_dir = setup_django()
+    try:
+        from todo.models import TodoItem
+
+        rows = []
+        elapsed = bench_direct(TodoItem, count)
+        rows.append(('direct create', f'{count / elapsed:>10.0f} inserts/sec'))
+        for batch_size in (10, 100, 500):
+            elapsed = bench_batched(TodoItem, count, batch_size)
+            rows.append((f'write-behind (batch={batch_size})', f'{count / elapsed:>10.0f} inserts/sec'))
+        report(f'Todo inserts ({count} rows, SQLite file)', rows)
+    finally:
+        teardown_django(tmp_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,6 @@
 #!/bin/bash
-python manage.py migrate
+# Only one container needs to migrate; set RUN_MIGRATIONS=0 on the others.
+if [ "${RUN_MIGRATIONS:-1}" = "1" ]; then
+    python manage.py migrate
+fi
 python manage.py runserver 0.0.0.0:8000
\ No newline at end of file
@@ -1,10 +1,75 @@
 from django.contrib import admin
-from .models import TodoItem
+from django.db import transaction
+
+from . import history
+from .models import Tag, TodoItem, TodoItemTag, TodoList
+from .tags import invalidate_tag_counts
+
+class TodoItemTagInline(admin.TabularInline):
+    model = TodoItemTag
+    fields = ['tag']
+    autocomplete_fields = ['tag']
+    extra = 1
+
 
 # Register your models here for admin panel
 @admin.register(TodoItem)
 class TodoItemAdmin(admin.ModelAdmin):
-    list_display = ['title', 'completed', 'created_at']
-    list_filter = ['completed', 'created_at']
+    list_display = ['title', 'completed', 'priority', 'due_at', 'tag_names', 'created_at']
+    list_filter = ['completed', 'priority', 'recurrence', 'todo_list', 'tags', 'created_at']
     search_fields = ['title', 'description']
     ordering = ['-created_at']
+    raw_id_fields = ['parent']
+    inlines = [TodoItemTagInline]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related('tags')
+
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            super().save_model(request, obj, form, change)
+            history.record_form(form, history.actor_of(request), created=not change)
+
+    # Deleting from the admin only marks todos deleted; purge_todos removes
+    # them, and their cascades, in small batches later.
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            obj.soft_delete()
+            history.record_deleted(obj.deleted_at, history.actor_of(request), item=obj)
+        invalidate_tag_counts()
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            deleted_at = queryset.soft_delete()
+            if deleted_at is not None:
+                history.record_deleted(deleted_at, history.actor_of(request))
+        invalidate_tag_counts()
+
+    @admin.display(description='Tags')
+    def tag_names(self, obj):
+        return ', '.join(tag.name for tag in obj.tags.all())
+
+
+@admin.register(TodoList)
+class TodoListAdmin(admin.ModelAdmin):
+    list_display = ['name', 'created_at']
+    search_fields = ['name']
+
+    # A list's todos are soft-deleted with it, so they can still be restored
+    # (without their list) until purge_todos removes them.
+    def delete_model(self, request, obj):
+        self.delete_queryset(request, TodoList.objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            deleted_at = TodoItem.objects.filter(todo_list__in=queryset).soft_delete()
+            if deleted_at is not None:
+                history.record_deleted(deleted_at, history.actor_of(request))
+            queryset.delete()
+        invalidate_tag_counts()
+
+
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    list_display = ['name']
+    search_fields = ['name']
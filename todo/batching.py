@@ -0,0 +1,237 @@
+"""
+Write-behind batching for high-rate todo creation.
+
+Creates are buffered in a bounded, thread-safe queue and written by a
+single background thread with ``bulk_create`` every ``batch_size`` items
+or ``flush_interval`` seconds, whichever comes first. A batch that fails
+is logged and retried row by row, so only the rows that fail on their own
+are dropped.
+"""
+
+import atexit
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+class WriteBehindFull(Exception):
+    """Raised when the buffer stays full for longer than ``put_timeout``."""
+
+
+class _FlushMarker:
+    """Queue entry asking the writer to write out everything before it."""
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class WriteBehindQueue:
+    """
+    Bounded buffer of unsaved model instances flushed with bulk_create.
+    ``on_write``, if given, is called with each written batch inside the
+    batch's transaction.
+    """
+
+    def __init__(self, model, batch_size=100, flush_interval=0.05,
+                 max_pending=10000, put_timeout=1.0, using='default', on_write=None):
+        self.model = model
+        self.on_write = on_write
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.using = using
+        self._pending = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopping = False
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping = False
+                self._thread = threading.Thread(
+                    target=self._run, name='todo-write-behind', daemon=True
+                )
+                self._thread.start()
+        return self
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def submit(self, obj, wait=False, timeout=None):
+        """
+        Enqueue ``obj`` for insertion and return a Future resolving to it.
+
+        Blocks for up to ``put_timeout`` seconds while the buffer is full
+        (backpressure) and raises WriteBehindFull after that. With
+        ``wait=True`` the buffer is flushed and the saved instance, with
+        its primary key set, is returned instead of the Future.
+        """
+        if self._stopping:
+            raise RuntimeError('WriteBehindQueue has been stopped.')
+        future = Future()
+        try:
+            self._pending.put((obj, future), timeout=self.put_timeout)
+        except queue.Full:
+            raise WriteBehindFull(
+                'Write-behind buffer is full (%d pending).' % self._pending.qsize()
+            ) from None
+        if wait:
+            self.flush(timeout=timeout)
+            return future.result(timeout=timeout)
+        return future
+
+    def flush(self, timeout=None):
+        """Write out everything submitted so far and wait for it."""
+        if not self.running:
+            self._drain()
+            return
+        marker = _FlushMarker()
+        try:
+            self._pending.put(marker, timeout=timeout)
+        except queue.Full:
+            raise TimeoutError('Timed out waiting for write-behind flush.') from None
+        if not marker.done.wait(timeout):
+            raise TimeoutError('Timed out waiting for write-behind flush.')
+
+    def stop(self, flush=True, timeout=None):
+        """Stop the writer thread, flushing pending items first by default."""
+        self._stopping = True
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            self._pending.put(None)
+            thread.join(timeout)
+        self._thread = None
+        if flush:
+            self._drain()
+
+    def _drain(self):
+        batch = []
+        while True:
+            try:
+                item = self._pending.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, _FlushMarker):
+                item.done.set()
+            elif item is not None:
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    self._write(batch)
+                    batch = []
+        self._write(batch)
+
+    def _run(self):
+        close_old_connections()
+        try:
+            while True:
+                item = self._pending.get()
+                if item is None:
+                    return
+                if isinstance(item, _FlushMarker):
+                    item.done.set()
+                    continue
+                batch = [item]
+                deadline = time.monotonic() + self.flush_interval
+                stop = False
+                while len(batch) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = self._pending.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        stop = True
+                        break
+                    if isinstance(item, _FlushMarker):
+                        self._write(batch)
+                        batch = []
+                        item.done.set()
+                        break
+                    batch.append(item)
+                self._write(batch)
+                if stop:
+                    return
+        finally:
+            connections[self.using].close()
+
+    def _insert(self, objs):
+        with transaction.atomic(using=self.using):
+            self.model.objects.using(self.using).bulk_create(objs)
+            if self.on_write is not None:
+                self.on_write(objs)
+
+    def _write(self, batch):
+        if not batch:
+            return
+        objs = [obj for obj, future in batch]
+        snapshots = [_snapshot(obj) for obj in objs]
+        try:
+            self._insert(objs)
+        except Exception:
+            # Submitters were told their todo was created, so one bad row or
+            # a transient error must not drop the whole batch.
+            logger.exception('Write-behind batch of %d failed; retrying row by row.', len(batch))
+        else:
+            for obj, future in batch:
+                future.set_result(obj)
+            return
+        for position, ((obj, future), snapshot) in enumerate(zip(batch, snapshots)):
+            _restore(obj, snapshot)
+            try:
+                self._insert([obj])
+            except Exception as exc:
+                logger.exception('Write-behind row %d of %d failed; dropping it.', position + 1, len(batch))
+                future.set_exception(exc)
+            else:
+                future.set_result(obj)
+
+
+def _snapshot(obj):
+    state = dict(obj.__dict__)
+    del state['_state']
+    return state
+
+
+def _restore(obj, snapshot):
+    """Undo what a rolled-back insert left on ``obj`` (its pk, for one)."""
+    obj.__dict__.update(snapshot)
+    obj._state.adding, obj._state.db = True, None
+
+
+_default_queue = None
+_default_queue_lock = threading.Lock()
+
+
+def get_write_behind_queue():
+    """
+    Return the process-wide queue configured by ``TODO_WRITE_BEHIND``, or
+    None when write-behind batching is disabled.
+    """
+    global _default_queue
+    config = getattr(settings, 'TODO_WRITE_BEHIND', {})
+    if not config.get('ENABLED', False):
+        return None
+    with _default_queue_lock:
+        if _default_queue is None:
+            from .history import record_created
+            from .models import TodoItem
+            _default_queue = WriteBehindQueue(
+                TodoItem,
+                batch_size=config.get('BATCH_SIZE', 100),
+                flush_interval=config.get('FLUSH_INTERVAL_MS', 50) / 1000,
+                max_pending=config.get('MAX_PENDING', 10000),
+                put_timeout=config.get('PUT_TIMEOUT', 1.0),
+                on_write=record_created,
+            ).start()
+            atexit.register(_default_queue.stop)
+    return _default_queue
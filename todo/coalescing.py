@@ -0,0 +1,55 @@
+"""
+Single-flight coalescing of identical concurrent work.
+
+When many threads ask for the same key at once, the first one (the leader)
+runs the computation and the rest wait for and share its result, or its
+exception. The key is forgotten as soon as the leader finishes, so nothing
+is cached beyond the burst.
+"""
+
+import threading
+from concurrent.futures import Future
+
+
+class _Call:
+    def __init__(self):
+        self.future = Future()
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, func, timeout=None):
+        """
+        Return ``func()``, sharing one call among every concurrent caller
+        with an equal ``key``.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+        if not leader:
+            return call.future.result(timeout)
+        try:
+            result = func()
+        except BaseException as exc:
+            call.future.set_exception(exc)
+            raise
+        else:
+            call.future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def waiting(self, key):
+        """Number of callers currently waiting on the leader for ``key``."""
+        with self._lock:
+            call = self._calls.get(key)
+            return call.waiters if call is not None else 0
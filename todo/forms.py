@@ -1,10 +1,20 @@
 from django import forms
-from .models import TodoItem
+from .models import Tag, TodoItem
 
 class TodoItemForm(forms.ModelForm):
+    tags = forms.CharField(
+        required=False,
+        label='Tags',
+        help_text='Separate tags with commas.',
+        widget=forms.TextInput(attrs={
+            'class': 'form-control',
+            'placeholder': 'e.g. work, errands'
+        })
+    )
+
     class Meta:
         model = TodoItem
-        fields = ['title', 'description', 'completed']
+        fields = ['title', 'description', 'completed', 'due_at', 'priority', 'recurrence', 'todo_list', 'parent']
         widgets = {
             'title': forms.TextInput(attrs={
                 'class': 'form-control',
@@ -18,10 +28,56 @@ class TodoItemForm(forms.ModelForm):
             }),
             'completed': forms.CheckboxInput(attrs={
                 'class': 'form-check-input'
-            })
+            }),
+            'due_at': forms.DateTimeInput(attrs={
+                'class': 'form-control',
+                'type': 'datetime-local'
+            }, format='%Y-%m-%dT%H:%M'),
+            'priority': forms.Select(attrs={
+                'class': 'form-select'
+            }),
+            'recurrence': forms.Select(attrs={
+                'class': 'form-select'
+            }),
+            'todo_list': forms.Select(attrs={
+                'class': 'form-select'
+            }),
+            # Subtasks are added from their parent's card, so the parent is
+            # never picked from a list of every todo.
+            'parent': forms.HiddenInput()
         }
         labels = {
             'title': 'Title',
             'description': 'Description',
-            'completed': 'Mark as completed'
+            'completed': 'Mark as completed',
+            'due_at': 'Due',
+            'priority': 'Priority',
+            'recurrence': 'Repeats',
+            'todo_list': 'List',
+            'parent': 'Subtask of'
         }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Clients that predate priorities do not send one; keep the default.
+        self.fields['priority'].required = False
+        if self.instance.pk is not None:
+            self.initial.setdefault('tags', ', '.join(tag.name for tag in self.instance.tags.all()))
+
+    def clean_priority(self):
+        return self.cleaned_data['priority'] or TodoItem.Priority.NORMAL
+
+    def clean_tags(self):
+        max_length = Tag._meta.get_field('name').max_length
+        names = []
+        for name in self.cleaned_data['tags'].split(','):
+            name = name.strip().lower()
+            if len(name) > max_length:
+                raise forms.ValidationError('Tags can be at most %d characters long.' % max_length)
+            if name and name not in names:
+                names.append(name)
+        return names
+
+    def _save_m2m(self):
+        super()._save_m2m()
+        self.instance.tags.set(Tag.objects.for_names(self.cleaned_data['tags']))
@@ -0,0 +1,191 @@
+"""
+Append-only change history for todos.
+
+Every ``record_*`` helper writes its entries with one bulk insert and is
+meant to be called inside the transaction that made the change, so a
+change and its history commit or roll back together. Only the fields that
+changed are stored, as ``{field: [old, new]}``.
+
+``compact()`` merges runs of old updates into single entries, and
+``drop_periods()`` deletes whole months of history through the period
+index.
+"""
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import TodoChange, TodoItem, add_months, history_period, subtree_range
+
+TRACKED_FIELDS = [
+    'title', 'description', 'completed', 'due_at', 'priority', 'recurrence', 'todo_list', 'parent',
+]
+
+
+def snapshot(item):
+    """The tracked field values of ``item``, with related todos and lists as ids."""
+    return {name: TodoItem._meta.get_field(name).value_from_object(item) for name in TRACKED_FIELDS}
+
+
+def diff(old, new):
+    return {name: [old.get(name), value] for name, value in new.items() if old.get(name) != value}
+
+
+def _defaults():
+    return {name: TodoItem._meta.get_field(name).get_default() for name in TRACKED_FIELDS}
+
+
+def actor_of(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.get_username()
+    return ''
+
+
+def record(entries, actor='', using=None):
+    """Append ``(item_id, action, changes)`` entries, skipping empty updates."""
+    now = timezone.now()
+    rows = [
+        TodoChange(
+            item_id=item_id, action=action, changes=changes, actor=actor,
+            changed_at=now, period=history_period(now),
+        )
+        for item_id, action, changes in entries
+        if changes or action != TodoChange.Action.UPDATED
+    ]
+    TodoChange.objects.using(using).bulk_create(rows)
+    return rows
+
+
+def record_created(items, actor='', using=None):
+    """
+    Record freshly created todos. A todo's ``history_actor`` attribute,
+    when set, overrides ``actor`` (for writes deferred to another thread).
+    """
+    defaults = _defaults()
+    now = timezone.now()
+    rows = [
+        TodoChange(
+            item_id=item.pk, action=TodoChange.Action.CREATED, changes=diff(defaults, snapshot(item)),
+            actor=getattr(item, 'history_actor', actor), changed_at=now, period=history_period(now),
+        )
+        for item in items
+    ]
+    TodoChange.objects.using(using).bulk_create(rows)
+    return rows
+
+
+def record_form(form, actor='', created=False):
+    """Record what a saved TodoItem model form created or changed."""
+    item = form.instance
+    if created:
+        changes = diff(_defaults(), snapshot(item))
+        old_tags = []
+    else:
+        current = snapshot(item)
+        changes = diff(
+            {name: form.initial.get(name) for name in form.changed_data if name in current},
+            {name: current[name] for name in form.changed_data if name in current},
+        )
+        old_tags = sorted(filter(None, (name.strip() for name in form.initial.get('tags', '').split(','))))
+    if 'tags' in form.fields:
+        new_tags = sorted(form.cleaned_data['tags'])
+        if new_tags != old_tags:
+            changes['tags'] = [old_tags, new_tags]
+    action = TodoChange.Action.CREATED if created else TodoChange.Action.UPDATED
+    return record([(item.pk, action, changes)], actor)
+
+
+def _deleted_with(deleted_at, item=None):
+    queryset = TodoItem.all_objects.filter(deleted_at=deleted_at)
+    if item is not None:
+        lower, upper = subtree_range(item.path)
+        queryset = queryset.filter(path__gte=lower, path__lt=upper)
+    return queryset.values_list('pk', flat=True)
+
+
+def record_deleted(deleted_at, actor='', item=None):
+    """Record the todos soft-deleted at ``deleted_at`` (under ``item``, if given)."""
+    changes = {'deleted_at': [None, deleted_at]}
+    return record([(pk, TodoChange.Action.DELETED, changes) for pk in _deleted_with(deleted_at, item)], actor)
+
+
+def record_restored(item, actor=''):
+    """Record the todos ``item.restore()`` is about to bring back."""
+    changes = {'deleted_at': [item.deleted_at, None]}
+    return record(
+        [(pk, TodoChange.Action.RESTORED, changes) for pk in _deleted_with(item.deleted_at, item)], actor,
+    )
+
+
+def compact(before, batch_size=1000):
+    """
+    Merge each run of consecutive updates to a todo by the same actor in the
+    same period, made before ``before``, into the run's last entry. Fields
+    that ended where they started are dropped. Returns the number of
+    entries removed.
+    """
+    removed = 0
+    run = []
+    after = None
+    while True:
+        queryset = TodoChange.objects.filter(changed_at__lt=before).order_by('item_id', 'id')
+        if after is not None:
+            queryset = queryset.filter(Q(item_id__gt=after[0]) | Q(item_id=after[0], id__gt=after[1]))
+        rows = list(queryset[:batch_size])
+        merged, deleted = [], []
+        for row in rows:
+            if run and not _continues(run[-1], row):
+                _merge(run, merged, deleted)
+                run = []
+            if row.action == TodoChange.Action.UPDATED:
+                run.append(row)
+        if len(rows) < batch_size:
+            _merge(run, merged, deleted)
+            run = []
+        with transaction.atomic():
+            TodoChange.objects.bulk_update(merged, ['changes'], batch_size=500)
+            TodoChange.objects.filter(pk__in=deleted).delete()
+        removed += len(deleted)
+        if len(rows) < batch_size:
+            return removed
+        after = rows[-1].item_id, rows[-1].id
+
+
+def _continues(previous, row):
+    return (
+        row.action == TodoChange.Action.UPDATED
+        and (row.item_id, row.actor, row.period) == (previous.item_id, previous.actor, previous.period)
+    )
+
+
+def _merge(run, merged, deleted):
+    if len(run) < 2:
+        return
+    changes = {}
+    for row in run:
+        for name, (old, new) in row.changes.items():
+            changes[name] = [changes[name][0] if name in changes else old, new]
+    last = run[-1]
+    last.changes = {name: values for name, values in changes.items() if values[0] != values[1]}
+    deleted.extend(row.pk for row in run[:-1])
+    if last.changes:
+        merged.append(last)
+    else:
+        deleted.append(last.pk)
+
+
+def drop_periods(months, batch_size=1000, now=None):
+    """
+    Delete history from periods more than ``months`` months old, at most
+    ``batch_size`` rows per transaction. Returns the number deleted.
+    """
+    cutoff = history_period(add_months(now or timezone.now(), -months))
+    dropped = 0
+    while True:
+        pks = list(TodoChange.objects.filter(period__lt=cutoff).order_by().values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return dropped
+        with transaction.atomic():
+            TodoChange.objects.filter(pk__in=pks).delete()
+        dropped += len(pks)
@@ -0,0 +1,217 @@
+"""
+Parallel bulk import of todos from JSON Lines or CSV files.
+
+The input is split into byte ranges aligned to line boundaries. Each range
+is parsed and validated in a worker process, and the parent process is the
+single writer, inserting each validated chunk with ``bulk_create`` inside
+its own transaction. CSV files must not contain quoted newlines.
+
+Worker code here must not import Django models, so that workers start
+without loading the app registry; the validation rules are passed in from
+the parent.
+"""
+
+import csv
+import io
+import json
+import os
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+ValidationRules = namedtuple('ValidationRules', [
+    'title_max_length', 'priorities', 'default_priority', 'recurrences', 'timezone',
+])
+
+ImportResult = namedtuple('ImportResult', ['imported', 'rejected', 'errors', 'elapsed'])
+
+MAX_REPORTED_ERRORS = 50
+
+
+def detect_format(path):
+    return 'csv' if str(path).lower().endswith('.csv') else 'jsonl'
+
+
+def split_ranges(path, chunk_bytes, skip_header=False):
+    """Split ``path`` into (start, end) byte ranges that end on newlines."""
+    size = os.path.getsize(path)
+    ranges = []
+    with open(path, 'rb') as handle:
+        start = 0
+        if skip_header:
+            handle.readline()
+            start = handle.tell()
+        while start < size:
+            handle.seek(min(start + chunk_bytes, size))
+            if handle.tell() < size:
+                handle.readline()
+            end = handle.tell()
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def read_header(path):
+    with open(path, newline='', encoding='utf-8') as handle:
+        return next(csv.reader(handle), [])
+
+
+def _clean_bool(value):
+    # Same mapping as django.forms.CheckboxInput.value_from_datadict.
+    if isinstance(value, str):
+        value = {'true': True, 'false': False}.get(value.lower(), value)
+    return bool(value)
+
+
+def _clean_datetime(value, tz):
+    # Naive values are read in ``tz``, as the form reads them in the
+    # current time zone.
+    if value in (None, ''):
+        return None
+    parsed = datetime.fromisoformat(str(value).strip())
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=tz)
+    return parsed
+
+
+def validate_row(row, rules):
+    """
+    Validate one input row with the same rules as TodoItemForm. Returns
+    ``(values, None)`` on success, where values is a (title, description,
+    completed, due_at, priority, recurrence) tuple, or ``(None, message)``.
+    """
+    title = str(row.get('title') or '').strip()
+    if not title:
+        return None, 'title: This field is required.'
+    if '\x00' in title or '\x00' in str(row.get('description') or ''):
+        return None, 'Null characters are not allowed.'
+    if len(title) > rules.title_max_length:
+        return None, 'title: Ensure this value has at most %d characters (it has %d).' % (
+            rules.title_max_length, len(title))
+    description = str(row.get('description') or '').strip()
+    completed = _clean_bool(row.get('completed', False))
+    try:
+        due_at = _clean_datetime(row.get('due_at'), rules.timezone)
+    except ValueError:
+        return None, 'due_at: Enter a valid date/time.'
+    priority = row.get('priority')
+    if priority in (None, ''):
+        priority = rules.default_priority
+    else:
+        try:
+            priority = int(priority)
+        except (TypeError, ValueError):
+            priority = None
+        if priority not in rules.priorities:
+            return None, 'priority: Select a valid choice.'
+    recurrence = str(row.get('recurrence') or '').strip()
+    if recurrence not in rules.recurrences:
+        return None, 'recurrence: Select a valid choice.'
+    if recurrence and due_at is None:
+        return None, 'recurrence: Recurring todos need a due date.'
+    return (title, description, completed, due_at, priority, recurrence), None
+
+
+def parse_chunk(path, start, end, fmt, fieldnames, rules):
+    """Parse and validate the rows in ``path[start:end]`` (runs in a worker)."""
+    with open(path, 'rb') as handle:
+        handle.seek(start)
+        data = handle.read(end - start).decode('utf-8')
+    if fmt == 'csv':
+        records = csv.DictReader(io.StringIO(data, newline=''), fieldnames=fieldnames)
+    else:
+        records = (line for line in data.splitlines() if line.strip())
+    rows, errors, rejected = [], [], 0
+    for number, record in enumerate(records, start=1):
+        if fmt != 'csv':
+            try:
+                record = json.loads(record)
+            except ValueError:
+                record = None
+            if not isinstance(record, dict):
+                rejected += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append('bytes %d-%d, row %d: not a JSON object' % (start, end, number))
+                continue
+        values, error = validate_row(record, rules)
+        if error:
+            rejected += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append('bytes %d-%d, row %d: %s' % (start, end, number, error))
+        else:
+            rows.append(values)
+    return rows, rejected, errors
+
+
+def default_rules():
+    from django.utils import timezone
+    from .models import TodoItem
+    return ValidationRules(
+        title_max_length=TodoItem._meta.get_field('title').max_length,
+        priorities=frozenset(TodoItem.Priority.values),
+        default_priority=TodoItem.Priority.NORMAL,
+        recurrences=frozenset(TodoItem.Recurrence.values),
+        timezone=timezone.get_current_timezone(),
+    )
+
+
+def import_todos(path, workers=None, chunk_bytes=4 * 1024 * 1024, batch_size=1000):
+    """
+    Import todos from ``path`` using ``workers`` parser processes (all CPUs
+    by default; 1 parses in-process). Returns an ImportResult.
+    """
+    from django.db import transaction
+    from . import history
+    from .models import TodoItem
+
+    started = time.perf_counter()
+    fmt = detect_format(path)
+    fieldnames = read_header(path) if fmt == 'csv' else None
+    rules = default_rules()
+    ranges = split_ranges(path, chunk_bytes, skip_header=fmt == 'csv')
+    workers = workers or os.cpu_count() or 1
+
+    def write(result):
+        rows, rejected, errors = result
+        objs = [
+            TodoItem(title=title, description=description, completed=completed,
+                     due_at=due_at, priority=priority, recurrence=recurrence)
+            for title, description, completed, due_at, priority, recurrence in rows
+        ]
+        with transaction.atomic():
+            TodoItem.objects.bulk_create(objs, batch_size=batch_size)
+            history.record_created(objs, actor='import')
+        return len(objs), rejected, errors
+
+    args = [(path, start, end, fmt, fieldnames, rules) for start, end in ranges]
+    imported = rejected = 0
+    all_errors = []
+    if workers == 1:
+        results = (parse_chunk(*chunk) for chunk in args)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        results = _parse_in_pool(executor, args, window=workers * 2)
+    try:
+        for result in results:
+            count, chunk_rejected, errors = write(result)
+            imported += count
+            rejected += chunk_rejected
+            all_errors.extend(errors[:MAX_REPORTED_ERRORS - len(all_errors)])
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    return ImportResult(imported, rejected, all_errors, time.perf_counter() - started)
+
+
+def _parse_in_pool(executor, args, window):
+    # Keep a bounded number of chunks in flight so parsed rows never pile up
+    # in memory faster than the single writer can insert them.
+    pending = deque()
+    for chunk in args:
+        pending.append(executor.submit(parse_chunk, *chunk))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
@@ -0,0 +1,37 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from todo.history import compact, drop_periods
+
+
+class Command(BaseCommand):
+    help = (
+        'Merge old runs of todo updates into single history entries and drop '
+        'history periods past the retention window.'
+    )
+
+    def add_arguments(self, parser):
+        config = getattr(settings, 'TODO_HISTORY', {})
+        parser.add_argument(
+            '--compact-after', type=int, default=config.get('COMPACT_AFTER_DAYS', 30),
+            help='Compact updates older than this many days.',
+        )
+        parser.add_argument(
+            '--retention', type=int, default=config.get('RETENTION_MONTHS', 24),
+            help='Drop monthly periods older than this many months.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=config.get('BATCH_SIZE', 1000),
+            help='History rows read or deleted per transaction.',
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        merged = compact(now - timedelta(days=options['compact_after']), batch_size=options['batch_size'])
+        dropped = drop_periods(options['retention'], batch_size=options['batch_size'], now=now)
+        self.stdout.write(self.style.SUCCESS(
+            'Compacted away %d history entries and dropped %d from expired periods.' % (merged, dropped)
+        ))
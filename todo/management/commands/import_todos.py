@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from todo.importer import import_todos
+
+
+class Command(BaseCommand):
+    help = 'Import todos from a JSON Lines (.jsonl) or CSV (.csv) file using a pool of parser processes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import.')
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help='Parser processes (default: number of CPUs; 1 parses in-process).',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=4096,
+            help='Kilobytes of input per parse task and write transaction (default: 4096).',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per INSERT statement.')
+
+    def handle(self, *args, **options):
+        try:
+            result = import_todos(
+                options['path'],
+                workers=options['workers'],
+                chunk_bytes=options['chunk_size'] * 1024,
+                batch_size=options['batch_size'],
+            )
+        except OSError as exc:
+            raise CommandError(exc)
+        for error in result.errors:
+            self.stderr.write(error)
+        self.stdout.write(self.style.SUCCESS(
+            'Imported %d todos (%d rejected) in %.2fs, %.0f rows/sec.' % (
+                result.imported, result.rejected, result.elapsed,
+                result.imported / result.elapsed if result.elapsed else 0,
+            )
+        ))
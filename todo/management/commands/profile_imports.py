@@ -0,0 +1,59 @@
+import os
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def parse_importtime(output):
+    """Parse ``-X importtime`` stderr into (module, self_us, cumulative_us) rows."""
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|')
+        rows.append((module.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+class Command(BaseCommand):
+    help = 'Report the slowest imports when cold-starting a module under a settings profile.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target', default='todoproject.wsgi',
+            help='Module to import in a fresh interpreter (default: todoproject.wsgi).',
+        )
+        parser.add_argument(
+            '--profile', default=None,
+            help='Settings module to profile (default: the current settings module).',
+        )
+        parser.add_argument('--limit', type=int, default=20, help='Number of hot spots to show.')
+        parser.add_argument(
+            '--sort', choices=['self', 'cumulative'], default='cumulative',
+            help='Rank imports by their own time or including their dependencies.',
+        )
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=options['profile'] or settings.SETTINGS_MODULE)
+        code = 'import django; django.setup(); import %s' % options['target']
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code],
+            env=env, capture_output=True, text=True, cwd=settings.BASE_DIR,
+        )
+        elapsed = time.perf_counter() - start
+        rows = parse_importtime(result.stderr)
+        if result.returncode != 0:
+            errors = [line for line in result.stderr.splitlines() if not line.startswith('import time:')]
+            raise CommandError('Importing %s failed:\n%s' % (options['target'], '\n'.join(errors)))
+
+        key = 1 if options['sort'] == 'self' else 2
+        rows.sort(key=lambda row: row[key], reverse=True)
+        self.stdout.write('Cold start of %s with %s: %.0f ms wall, %d modules imported' % (
+            options['target'], env['DJANGO_SETTINGS_MODULE'], elapsed * 1000, len(rows)))
+        self.stdout.write('%10s %12s  %s' % ('self ms', 'cumulative ms', 'module'))
+        for module, self_us, cumulative_us in rows[:options['limit']]:
+            self.stdout.write('%10.1f %12.1f  %s' % (self_us / 1000, cumulative_us / 1000, module))
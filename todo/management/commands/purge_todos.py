@@ -0,0 +1,46 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from todo.models import TodoItem
+
+
+class Command(BaseCommand):
+    help = (
+        'Permanently delete todos soft-deleted longer ago than the retention window, '
+        'in small transactions so interactive writers are never blocked for long.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help='Todos deleted per transaction (default: TODO_SOFT_DELETE PURGE_BATCH_SIZE).',
+        )
+        parser.add_argument(
+            '--pause', type=float, default=None,
+            help='Seconds to sleep between transactions (default: TODO_SOFT_DELETE PURGE_PAUSE_MS).',
+        )
+
+    def handle(self, *args, **options):
+        config = getattr(settings, 'TODO_SOFT_DELETE', {})
+        batch_size = options['batch_size'] or config.get('PURGE_BATCH_SIZE', 500)
+        pause = options['pause']
+        if pause is None:
+            pause = config.get('PURGE_PAUSE_MS', 50) / 1000
+        purged = batches = 0
+        while True:
+            # Subtasks come first, so each batch's cascade has nothing left
+            # to collect.
+            pks = list(TodoItem.all_objects.purgeable().values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                break
+            with transaction.atomic():
+                deleted, by_model = TodoItem.all_objects.purgeable().filter(pk__in=pks).delete()
+            purged += by_model.get(TodoItem._meta.label, 0)
+            batches += 1
+            if len(pks) < batch_size:
+                break
+            time.sleep(pause)
+        self.stdout.write(self.style.SUCCESS('Purged %d todos in %d batches.' % (purged, batches)))
@@ -0,0 +1,43 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from todo.scheduler import DueScheduler
+from todo.signals import todo_due
+
+
+class Command(BaseCommand):
+    help = 'Fire due todos and materialize recurring ones without scanning the whole table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Process what is due now and exit.')
+        parser.add_argument(
+            '--lookahead', type=int, default=300,
+            help='Seconds of upcoming due dates to keep in memory (default: 300).',
+        )
+        parser.add_argument(
+            '--refresh', type=int, default=60,
+            help='Seconds between re-reading the lookahead window for new or edited todos (default: 60).',
+        )
+        parser.add_argument(
+            '--catch-up', type=int, default=0,
+            help='Also fire todos that became due up to this many seconds before startup.',
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        todo_due.connect(self.report_due, dispatch_uid='run_todo_scheduler')
+        scheduler = DueScheduler(
+            lookahead=timedelta(seconds=options['lookahead']),
+            refresh_interval=timedelta(seconds=options['refresh']),
+            batch_size=options['batch_size'],
+            catch_up=timedelta(seconds=options['catch_up']),
+        )
+        try:
+            scheduler.run(once=options['once'])
+        except KeyboardInterrupt:
+            pass
+
+    def report_due(self, sender, items, **kwargs):
+        for item in items:
+            self.stdout.write('Due: %s (#%d) at %s' % (item.title, item.pk, item.due_at.isoformat()))
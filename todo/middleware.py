@@ -0,0 +1,315 @@
+import math
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+from . import routers
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; without it only gzip is offered.
+    brotli = None
+
+PIN_COOKIE = 'todo_primary_pin'
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ReplicaPinningMiddleware:
+    """
+    Pin reads to the primary database for unsafe requests and, through a
+    short-lived cookie, for ``REPLICA_PIN_SECONDS`` after a client wrote.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.method not in SAFE_METHODS or PIN_COOKIE in request.COOKIES:
+            routers.pin_to_primary()
+        else:
+            routers.unpin()
+        try:
+            response = self.get_response(request)
+            if routers.is_pinned() and request.method not in SAFE_METHODS:
+                response.set_cookie(
+                    PIN_COOKIE, '1',
+                    max_age=getattr(settings, 'REPLICA_PIN_SECONDS', 5),
+                    httponly=True, samesite='Lax',
+                )
+            return response
+        finally:
+            routers.pin_to_primary()
+
+
+# Rate limiting
+
+class TokenBucketLimiter:
+    """
+    Token buckets keyed by client. Each bucket holds up to ``burst`` tokens
+    and refills at ``rate`` tokens per second; every request spends one.
+    Only the ``max_keys`` most recently seen clients are remembered.
+    """
+
+    def __init__(self, rate, burst, max_keys=10000, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self.clock = clock
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key):
+        """
+        Spend a token from ``key``'s bucket. Returns 0 when one was
+        available, otherwise the seconds until one will be.
+        """
+        now = self.clock()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens >= 1:
+                tokens, wait = tokens - 1, 0
+            else:
+                wait = (1 - tokens) / self.rate
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+class RateLimitMiddleware:
+    """
+    Answer 429 once a client outruns its token bucket, as configured by
+    ``TODO_RATE_LIMIT``. Authenticated users get a bucket each; anonymous
+    clients share one per IP address. Must come after
+    AuthenticationMiddleware, when that is installed.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        config = getattr(settings, 'TODO_RATE_LIMIT', {})
+        self.enabled = config.get('ENABLED', False)
+        self.proxy_count = config.get('PROXY_COUNT', 0)
+        max_clients = config.get('MAX_CLIENTS', 10000)
+        self.ip_limiter = TokenBucketLimiter(config.get('IP_RATE', 20), config.get('IP_BURST', 100), max_clients)
+        self.user_limiter = TokenBucketLimiter(
+            config.get('USER_RATE', 20), config.get('USER_BURST', 100), max_clients,
+        )
+
+    def __call__(self, request):
+        if self.enabled:
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                wait = self.user_limiter.take(user.pk)
+            else:
+                wait = self.ip_limiter.take(self.client_ip(request))
+            if wait:
+                response = HttpResponse(
+                    'Too many requests, please slow down.', status=429, content_type='text/plain',
+                )
+                response.headers['Retry-After'] = str(math.ceil(wait))
+                return response
+        return self.get_response(request)
+
+    def client_ip(self, request):
+        # Behind PROXY_COUNT proxies, the client is the address the
+        # outermost proxy appended to X-Forwarded-For.
+        if self.proxy_count:
+            forwarded = [
+                address.strip()
+                for address in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')
+                if address.strip()
+            ]
+            if len(forwarded) >= self.proxy_count:
+                return forwarded[-self.proxy_count]
+        return request.META.get('REMOTE_ADDR', '')
+
+
+# HTML minification
+
+_PRESERVE_RE = re.compile(r'<(pre|textarea|script|style)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+_COMMENT_RE = re.compile(r'<!--(?!\[if).*?-->', re.DOTALL)
+_WHITESPACE_RE = re.compile(r'[ \t\r\n\f]{2,}|[\t\r\n\f]')
+_TAG_RE = re.compile(r'''<[A-Za-z](?:"[^"]*"|'[^']*'|[^'">])*>''')
+_TAG_WHITESPACE_RE = re.compile(r'''("[^"]*"|'[^']*')|[ \t\r\n\f]+''')
+
+
+def _collapse_tag(match):
+    # Attribute values are data (form inputs post them back), so only the
+    # whitespace between attributes is collapsed.
+    return _TAG_WHITESPACE_RE.sub(lambda quoted: quoted.group(1) or ' ', match.group(0))
+
+
+def _collapse(text):
+    if '<!--' in text:
+        text = _COMMENT_RE.sub('', text)
+    parts = []
+    position = 0
+    for match in _TAG_RE.finditer(text):
+        parts.append(_WHITESPACE_RE.sub(' ', text[position:match.start()]))
+        parts.append(_collapse_tag(match))
+        position = match.end()
+    parts.append(_WHITESPACE_RE.sub(' ', text[position:]))
+    return ''.join(parts)
+
+
+def minify_html(html):
+    """
+    Collapse whitespace runs and drop comments, leaving attribute values
+    and the contents of <pre>, <textarea>, <script> and <style> untouched.
+    """
+    parts = []
+    position = 0
+    for match in _PRESERVE_RE.finditer(html):
+        parts.append(_collapse(html[position:match.start()]))
+        parts.append(match.group(0))
+        position = match.end()
+    parts.append(_collapse(html[position:]))
+    return ''.join(parts)
+
+
+class HtmlMinifyMiddleware:
+    """Minify rendered HTML responses when ``TODO_MINIFY_HTML`` is set."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            getattr(settings, 'TODO_MINIFY_HTML', False)
+            and not response.streaming
+            and not response.has_header('Content-Encoding')
+            and response.get('Content-Type', '').startswith('text/html')
+        ):
+            charset = response.charset
+            response.content = minify_html(response.content.decode(charset)).encode(charset)
+            if response.has_header('Content-Length'):
+                response.headers['Content-Length'] = str(len(response.content))
+        return response
+
+
+# Response compression
+
+def _parse_accept_encoding(header):
+    codings = {}
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            codings[coding.strip().lower()] = quality
+    return codings
+
+
+def _gzip_sequence(sequence, level=6):
+    # Sync-flush after every chunk so streamed pages still paint early.
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in sequence:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _brotli_sequence(sequence, quality):
+    compressor = brotli.Compressor(quality=quality)
+    for chunk in sequence:
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def _agzip_sequence(sequence, level=6):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    async for chunk in sequence:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+async def _abrotli_sequence(sequence, quality):
+    compressor = brotli.Compressor(quality=quality)
+    async for chunk in sequence:
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware:
+    """
+    Negotiate brotli or gzip compression from Accept-Encoding, including
+    for streaming responses. Non-streaming responses smaller than
+    ``MIN_SIZE`` bytes are sent as-is. Configured by
+    ``TODO_RESPONSE_COMPRESSION``.
+    """
+
+    max_random_bytes = 100
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        config = getattr(settings, 'TODO_RESPONSE_COMPRESSION', {})
+        if not config.get('ENABLED', False) or response.has_header('Content-Encoding'):
+            return response
+        if not response.streaming and len(response.content) < config.get('MIN_SIZE', 1024):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = self.select_encoding(request, config)
+        if encoding is None:
+            return response
+
+        quality = config.get('BROTLI_QUALITY', 5)
+        if response.streaming:
+            content = response.streaming_content
+            if encoding == 'br':
+                compress = _abrotli_sequence if response.is_async else _brotli_sequence
+                response.streaming_content = compress(content, quality)
+            else:
+                compress = _agzip_sequence if response.is_async else _gzip_sequence
+                response.streaming_content = compress(content)
+            del response.headers['Content-Length']
+        else:
+            if encoding == 'br':
+                compressed = brotli.compress(response.content, quality=quality)
+            else:
+                compressed = compress_string(response.content, max_random_bytes=self.max_random_bytes)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # A strong ETag no longer matches the encoded bytes.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    def select_encoding(self, request, config):
+        accepted = _parse_accept_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        for encoding in config.get('ENCODINGS', ['br', 'gzip']):
+            if encoding == 'br' and brotli is None:
+                continue
+            if accepted.get(encoding, accepted.get('*', 0)) > 0:
+                return encoding
+        return None
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='todoitem',
+            options={'ordering': ['-created_at', '-id']},
+        ),
+        migrations.AddIndex(
+            model_name='todoitem',
+            index=models.Index(fields=['-created_at', '-id'], name='todo_item_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Value
+from django.db.models.functions import Cast, Concat, LPad
+
+
+def backfill_paths(apps, schema_editor):
+    # Every existing todo is a top-level todo.
+    TodoItem = apps.get_model('todo', 'TodoItem')
+    TodoItem.objects.using(schema_editor.connection.alias).update(
+        path=Concat(LPad(Cast('pk', models.CharField()), 10, Value('0')), Value('/')),
+        depth=0,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0003_todoitem_scheduling'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TodoList',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='todoitem',
+            name='todo_item_recent_idx',
+        ),
+        migrations.AddField(
+            model_name='todoitem',
+            name='depth',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='todoitem',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='children', to='todo.todoitem'),
+        ),
+        migrations.AddField(
+            model_name='todoitem',
+            name='path',
+            field=models.TextField(blank=True, db_index=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='todoitem',
+            name='todo_list',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='items', to='todo.todolist'),
+        ),
+        migrations.AddIndex(
+            model_name='todoitem',
+            index=models.Index(fields=['depth', '-created_at', '-id'], name='todo_item_roots_idx'),
+        ),
+        migrations.RunPython(backfill_paths, migrations.RunPython.noop),
+    ]
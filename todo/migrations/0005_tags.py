@@ -0,0 +1,47 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:24
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0004_todo_lists_and_subtasks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TodoItemTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('item', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='tag_links', to='todo.todoitem')),
+                ('tag', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='item_links', to='todo.tag')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='todoitem',
+            name='tags',
+            field=models.ManyToManyField(blank=True, related_name='items', through='todo.TodoItemTag', to='todo.tag'),
+        ),
+        migrations.AddIndex(
+            model_name='todoitemtag',
+            index=models.Index(fields=['tag', '-created_at', '-item'], name='todo_tag_recent_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='todoitemtag',
+            constraint=models.UniqueConstraint(fields=('item', 'tag'), name='todo_item_tag_unique'),
+        ),
+    ]
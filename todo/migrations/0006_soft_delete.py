@@ -0,0 +1,38 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0005_tags'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='todoitem',
+            name='todo_item_due_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='todoitem',
+            name='todo_item_roots_idx',
+        ),
+        migrations.AddField(
+            model_name='todoitem',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='todoitem',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['depth', '-created_at', '-id'], name='todo_item_roots_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='todoitem',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['completed', 'due_at'], name='todo_item_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='todoitem',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', False)), fields=['deleted_at', '-depth'], name='todo_item_deleted_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:35
+
+import django.core.serializers.json
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0006_soft_delete'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TodoChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.PositiveSmallIntegerField(choices=[(1, 'Created'), (2, 'Updated'), (3, 'Deleted'), (4, 'Restored')])),
+                ('changes', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('actor', models.CharField(blank=True, max_length=150)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('period', models.PositiveIntegerField()),
+                ('item', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='changes', to='todo.todoitem')),
+            ],
+            options={
+                'ordering': ['-id'],
+                'indexes': [models.Index(fields=['item', '-id'], name='todo_change_item_idx'), models.Index(fields=['period'], name='todo_change_period_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0007_todo_history'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='todoitem',
+            name='todo_list',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='items', to='todo.todolist'),
+        ),
+    ]
@@ -1,15 +1,409 @@
-from django.db import models
+import calendar
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from django.db.models import Q, Value
+from django.db.models.functions import Cast, Concat, LPad, Substr
+from django.db.models.lookups import In
+from django.utils import timezone
 
 # Create your models here.
 
+# Materialized paths are the zero-padded primary keys of a todo's ancestors
+# and of the todo itself, each followed by '/'. '/' sorts before every
+# digit, so a subtree is one contiguous, index-ordered range of paths.
+PATH_SEGMENT_WIDTH = 10
+
+# SQLite caps expression trees at a depth of 1000, so one OR term per node
+# only works for small sets of nodes. Larger sets are matched on the path
+# prefix naming their ancestor, with one IN per depth and batch.
+MAX_SUBTREE_RANGES = 100
+SUBTREE_PREFIX_BATCH = 500
+
+
+def path_segment(pk):
+    return '%0*d/' % (PATH_SEGMENT_WIDTH, pk)
+
+
+def subtree_range(path):
+    """(lower, upper) bounds such that lower <= descendant path < upper."""
+    return path, path[:-1] + '0'
+
+
+def path_prefix(depth):
+    """The start of a path that is the path of its ancestor at ``depth``."""
+    return Substr('path', 1, (depth + 1) * (PATH_SEGMENT_WIDTH + 1))
+
+
+def deletion_retention():
+    """How long soft-deleted todos can be restored before they are purged."""
+    config = getattr(settings, 'TODO_SOFT_DELETE', {})
+    return timedelta(days=config.get('RETENTION_DAYS', 7))
+
+
+class TodoList(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        ordering = ['name']
+
+
+class TagQuerySet(models.QuerySet):
+    def for_names(self, names):
+        """Tags called ``names``, creating the missing ones in one insert."""
+        names = list(dict.fromkeys(names))
+        existing = {tag.name: tag for tag in self.filter(name__in=names)}
+        missing = [self.model(name=name) for name in names if name not in existing]
+        if missing:
+            self.bulk_create(missing, ignore_conflicts=True)
+            existing.update((tag.name, tag) for tag in self.filter(name__in=[tag.name for tag in missing]))
+        return [existing[name] for name in names]
+
+
+class Tag(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+
+    objects = TagQuerySet.as_manager()
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        ordering = ['name']
+
+
+class TodoItemQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        # Subtasks join their parent's list, as they do in TodoItem.save().
+        orphans = [obj for obj in objs if obj.parent_id is not None and obj.todo_list_id is None]
+        if orphans:
+            lists = dict(self.model._base_manager.using(self.db).filter(
+                pk__in={obj.parent_id for obj in orphans},
+            ).values_list('pk', 'todo_list_id'))
+            for obj in orphans:
+                obj.todo_list_id = lists.get(obj.parent_id)
+        objs = super().bulk_create(objs, *args, **kwargs)
+        self.model.assign_paths(objs, using=self.db)
+        return objs
+
+    def roots(self):
+        return self.filter(depth=0)
+
+    def subtree(self, node, include_self=True):
+        """The todo ``node`` and all its descendants, in depth-first order."""
+        lower, upper = subtree_range(node.path)
+        queryset = self.filter(path__gte=lower, path__lt=upper)
+        if not include_self:
+            queryset = queryset.exclude(pk=node.pk)
+        return queryset.order_by('path')
+
+    def descendants_of(self, nodes):
+        """Descendants of every todo in ``nodes``, fetched in one query."""
+        nodes = list(nodes)
+        if not nodes:
+            return self.none()
+        condition = Q()
+        if len(nodes) <= MAX_SUBTREE_RANGES:
+            for node in nodes:
+                lower, upper = subtree_range(node.path)
+                condition |= Q(path__gt=lower, path__lt=upper)
+        else:
+            paths = defaultdict(list)
+            for node in nodes:
+                paths[node.depth].append(node.path)
+            for depth, group in paths.items():
+                for start in range(0, len(group), SUBTREE_PREFIX_BATCH):
+                    batch = group[start:start + SUBTREE_PREFIX_BATCH]
+                    condition |= Q(In(path_prefix(depth), batch), depth__gt=depth)
+        return self.filter(condition).order_by('path')
+
+    def soft_delete(self):
+        """
+        Mark these todos and their subtasks deleted, matching each depth of
+        the selection with one path-prefix subquery, so the UPDATE does not
+        grow with the selection. Returns the deletion time, or None if there
+        was nothing to delete.
+        """
+        depths = sorted(self.order_by().values_list('depth', flat=True).distinct())
+        if not depths:
+            return None
+        deleted_at = timezone.now()
+        live = self.model.objects.using(self.db)
+        with transaction.atomic(using=self.db):
+            for start in range(0, len(depths), MAX_SUBTREE_RANGES):
+                condition = Q()
+                for depth in depths[start:start + MAX_SUBTREE_RANGES]:
+                    selected = self.filter(depth=depth).order_by().values('path')
+                    condition |= Q(In(path_prefix(depth), selected), depth__gte=depth)
+                live.filter(condition).update(deleted_at=deleted_at)
+        return deleted_at
+
+    def deleted(self):
+        return self.filter(deleted_at__isnull=False)
+
+    def restorable(self):
+        """
+        Todos deleted within the retention window that can be restored: the
+        ones whose parent, if any, is not itself deleted.
+        """
+        return self.filter(
+            Q(parent__isnull=True) | Q(parent__deleted_at__isnull=True),
+            deleted_at__gte=timezone.now() - deletion_retention(),
+        )
+
+    def purgeable(self):
+        """Deleted todos past the retention window, subtasks before parents."""
+        return self.filter(deleted_at__lt=timezone.now() - deletion_retention()).order_by('deleted_at', '-depth')
+
+
+class TodoItemManager(models.Manager.from_queryset(TodoItemQuerySet)):
+    """Default manager, hiding soft-deleted todos."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class TodoItem(models.Model):
+    class Priority(models.IntegerChoices):
+        LOW = 1, 'Low'
+        NORMAL = 2, 'Normal'
+        HIGH = 3, 'High'
+        URGENT = 4, 'Urgent'
+
+    class Recurrence(models.TextChoices):
+        NONE = '', 'Does not repeat'
+        DAILY = 'daily', 'Daily'
+        WEEKLY = 'weekly', 'Weekly'
+        MONTHLY = 'monthly', 'Monthly'
+
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     completed = models.BooleanField(default=False)
-    
+    due_at = models.DateTimeField(null=True, blank=True)
+    priority = models.PositiveSmallIntegerField(choices=Priority.choices, default=Priority.NORMAL)
+    recurrence = models.CharField(max_length=10, choices=Recurrence.choices, blank=True, default='')
+    todo_list = models.ForeignKey(
+        TodoList, null=True, blank=True, on_delete=models.SET_NULL, related_name='items',
+    )
+    parent = models.ForeignKey(
+        'self', null=True, blank=True, on_delete=models.CASCADE, related_name='children',
+    )
+    path = models.TextField(blank=True, default='', editable=False, db_index=True)
+    depth = models.PositiveIntegerField(default=0, editable=False)
+    tags = models.ManyToManyField(Tag, through='TodoItemTag', blank=True, related_name='items')
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = TodoItemManager()
+    all_objects = TodoItemQuerySet.as_manager()
+
     def __str__(self):
         return self.title
-    
+
+    def clean(self):
+        if self.recurrence and self.due_at is None:
+            raise ValidationError({'recurrence': 'Recurring todos need a due date.'})
+        if self.parent is not None and self.pk is not None and self.parent.path.startswith(self.path):
+            raise ValidationError({'parent': 'A todo cannot be a subtask of itself.'})
+
+    def save(self, *args, **kwargs):
+        if self.parent is not None and self.todo_list_id is None:
+            self.todo_list_id = self.parent.todo_list_id
+        super().save(*args, **kwargs)
+        parent_path = self.parent.path if self.parent is not None else ''
+        path = parent_path + path_segment(self.pk)
+        if path != self.path:
+            self.move_subtree(path)
+
+    def move_subtree(self, path):
+        """Store a new path for this todo and rewrite its descendants' paths."""
+        old_path, depth = self.path, path.count('/') - 1
+        manager = type(self)._base_manager.using(self._state.db)
+        manager.filter(pk=self.pk).update(path=path, depth=depth)
+        if old_path:
+            lower, upper = subtree_range(old_path)
+            manager.filter(path__gt=lower, path__lt=upper).update(
+                path=Concat(Value(path), Substr('path', len(old_path) + 1)),
+                depth=models.F('depth') + (depth - self.depth),
+            )
+        self.path, self.depth = path, depth
+
+    def soft_delete(self):
+        """Mark this todo and its subtasks deleted with one UPDATE."""
+        lower, upper = subtree_range(self.path)
+        self.deleted_at = timezone.now()
+        type(self).objects.using(self._state.db).filter(path__gte=lower, path__lt=upper).update(
+            deleted_at=self.deleted_at,
+        )
+
+    def restore(self):
+        """Undo soft_delete(), bringing back the subtasks deleted with it."""
+        lower, upper = subtree_range(self.path)
+        type(self).all_objects.using(self._state.db).filter(
+            path__gte=lower, path__lt=upper, deleted_at=self.deleted_at,
+        ).update(deleted_at=None)
+        self.deleted_at = None
+
+    @classmethod
+    def assign_paths(cls, objs, using=None):
+        """Fill in paths for freshly bulk-created todos."""
+        objs = [obj for obj in objs if obj.pk is not None and not obj.path]
+        manager = cls._base_manager.using(using)
+        roots = [obj.pk for obj in objs if obj.parent_id is None]
+        for start in range(0, len(roots), 500):
+            manager.filter(pk__in=roots[start:start + 500]).update(
+                path=Concat(LPad(Cast('pk', models.CharField()), PATH_SEGMENT_WIDTH, Value('0')), Value('/')),
+                depth=0,
+            )
+        children, known = [], {}
+        for obj in objs:
+            if obj.parent_id is None:
+                obj.path, obj.depth = path_segment(obj.pk), 0
+                known[obj.pk] = obj.path
+            else:
+                children.append(obj)
+        missing = {obj.parent_id for obj in children} - known.keys()
+        known.update(manager.filter(pk__in=missing).values_list('pk', 'path'))
+        for obj in children:
+            # Parents bulk-created in the same batch precede their children.
+            obj.path = known[obj.parent_id] + path_segment(obj.pk)
+            obj.depth = obj.path.count('/') - 1
+            known[obj.pk] = obj.path
+        if children:
+            manager.bulk_update(children, ['path', 'depth'], batch_size=500)
+
+    def next_occurrence(self, after=None):
+        """
+        Return the first due date of this todo's recurrence later than
+        ``after`` (by default, later than the current due date).
+        """
+        if not self.recurrence or self.due_at is None:
+            return None
+        after = after or self.due_at
+        due_at = self.due_at
+        if self.recurrence == self.Recurrence.MONTHLY:
+            months = 1
+            while True:
+                candidate = add_months(due_at, months)
+                if candidate > after:
+                    return candidate
+                months += 1
+        period = timedelta(days=7 if self.recurrence == self.Recurrence.WEEKLY else 1)
+        return due_at + ((after - due_at) // period + 1) * period
+
     class Meta:
-        ordering = ['-created_at']
+        ordering = ['-created_at', '-id']
+        # The list and scheduler indexes only cover live todos, matching the
+        # default manager's filter; the purge job scans deleted ones.
+        indexes = [
+            models.Index(
+                fields=['depth', '-created_at', '-id'], name='todo_item_roots_idx',
+                condition=Q(deleted_at__isnull=True),
+            ),
+            models.Index(
+                fields=['completed', 'due_at'], name='todo_item_due_idx',
+                condition=Q(deleted_at__isnull=True),
+            ),
+            models.Index(
+                fields=['deleted_at', '-depth'], name='todo_item_deleted_idx',
+                condition=Q(deleted_at__isnull=False),
+            ),
+        ]
+
+
+class TodoItemTag(models.Model):
+    """
+    A todo's tag. ``created_at`` is a copy of the todo's, so listing a tag
+    newest-first is a single range scan of the (tag, -created_at, item)
+    index without touching the todo table to sort.
+    """
+    # The composite indexes below lead with each foreign key, so the
+    # single-column ones Django would add are redundant.
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='item_links', db_index=False)
+    item = models.ForeignKey(TodoItem, on_delete=models.CASCADE, related_name='tag_links', db_index=False)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    def save(self, *args, **kwargs):
+        # Links made through ``item.tags.add()`` skip save(); the
+        # m2m_changed receiver in signals.py copies the date for those.
+        if self._state.adding:
+            self.created_at = self.item.created_at
+        super().save(*args, **kwargs)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['item', 'tag'], name='todo_item_tag_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['tag', '-created_at', '-item'], name='todo_tag_recent_idx'),
+        ]
+
+
+def history_period(when):
+    """The monthly partition a change made at ``when`` belongs to, as YYYYMM."""
+    return when.year * 100 + when.month
+
+
+class TodoChange(models.Model):
+    """
+    One entry of a todo's append-only history. ``changes`` maps each field
+    that changed to its ``[old, new]`` values; unchanged fields are left
+    out. Rows are grouped by month in ``period`` so that whole months of
+    history can be dropped together.
+    """
+    class Action(models.IntegerChoices):
+        CREATED = 1, 'Created'
+        UPDATED = 2, 'Updated'
+        DELETED = 3, 'Deleted'
+        RESTORED = 4, 'Restored'
+
+    # History outlives purged todos until its period is dropped, so there
+    # is no constraint and no cascade from the todo.
+    item = models.ForeignKey(
+        TodoItem, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, related_name='changes',
+    )
+    action = models.PositiveSmallIntegerField(choices=Action.choices)
+    changes = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    actor = models.CharField(max_length=150, blank=True)
+    changed_at = models.DateTimeField(default=timezone.now)
+    period = models.PositiveIntegerField()
+
+    def save(self, *args, **kwargs):
+        if self.period is None:
+            self.period = history_period(self.changed_at)
+        super().save(*args, **kwargs)
+
+    def entries(self):
+        """``(label, old, new)`` for each changed field."""
+        entries = []
+        for name, (old, new) in self.changes.items():
+            try:
+                label = TodoItem._meta.get_field(name).verbose_name
+            except FieldDoesNotExist:
+                label = name
+            entries.append((label, old, new))
+        return entries
+
+    class Meta:
+        ordering = ['-id']
+        indexes = [
+            models.Index(fields=['item', '-id'], name='todo_change_item_idx'),
+            models.Index(fields=['period'], name='todo_change_period_idx'),
+        ]
+
+
+def add_months(value, months):
+    """Add calendar months to a datetime, clamping to the end of the month."""
+    month_index = value.month - 1 + months
+    year, month = value.year + month_index // 12, month_index % 12 + 1
+    day = min(value.day, calendar.monthrange(year, month)[1])
+    return value.replace(year=year, month=month, day=day)
@@ -0,0 +1,114 @@
+"""
+Lightweight rows for rendering todo cards.
+
+The card templates only need a handful of columns and the first
+``CARD_WORDS`` words of the description, so the list views can read todos
+with ``values_list`` into ``TodoRow`` objects instead of model instances.
+The description is cut to ``DESCRIPTION_EXCERPT_CHARS`` by the database,
+so long descriptions are never transferred or held in memory. The rare
+excerpt too short to hold those words is completed by
+``complete_descriptions()``.
+"""
+
+from collections import namedtuple
+
+from django.db.models.functions import Length, Substr
+from django.db.models.lookups import GreaterThan
+from django.db.models.query import ValuesListIterable
+
+from .models import TodoItem, TodoItemTag
+
+# The truncatewords length in todo_card.html.
+CARD_WORDS = 20
+
+# Comfortably more than CARD_WORDS words of ordinary text.
+DESCRIPTION_EXCERPT_CHARS = 250
+
+ROW_FIELDS = (
+    'pk', 'title', 'description_excerpt', 'description_truncated', 'created_at', 'completed',
+    'due_at', 'priority', 'recurrence', 'todo_list_id', 'todo_list__name', 'parent_id', 'path', 'depth',
+)
+
+TagRow = namedtuple('TagRow', ['name'])
+
+_PRIORITY_LABELS = dict(TodoItem.Priority.choices)
+_RECURRENCE_LABELS = dict(TodoItem.Recurrence.choices)
+
+
+class TagList(list):
+    """A row's tags, answering ``.all`` like the related manager does."""
+
+    def all(self):
+        return self
+
+
+class TodoRow:
+    __slots__ = (
+        'pk', 'title', 'description', 'created_at', 'completed', 'due_at', 'priority', 'recurrence',
+        'todo_list_id', 'todo_list', 'parent_id', 'path', 'depth',
+        'tags', 'subtasks', 'level', 'subtask_count', 'subtasks_done', 'description_cut',
+    )
+
+    def __init__(self, pk, title, excerpt, truncated, created_at, completed, due_at, priority,
+                 recurrence, todo_list_id, todo_list, parent_id, path, depth):
+        self.pk, self.title, self.description = pk, title, excerpt
+        # With more than CARD_WORDS words the card's truncatewords drops the
+        # word the database cut through; with fewer the card needs the rest.
+        self.description_cut = truncated and len(excerpt.split(None, CARD_WORDS)) <= CARD_WORDS
+        self.created_at, self.completed, self.due_at = created_at, completed, due_at
+        self.priority, self.recurrence = priority, recurrence
+        self.todo_list_id, self.todo_list, self.parent_id = todo_list_id, todo_list, parent_id
+        self.path, self.depth = path, depth
+        self.tags = TagList()
+
+    @property
+    def id(self):
+        return self.pk
+
+    def __str__(self):
+        return self.title
+
+    def get_priority_display(self):
+        return _PRIORITY_LABELS.get(self.priority, self.priority)
+
+    def get_recurrence_display(self):
+        return _RECURRENCE_LABELS.get(self.recurrence, self.recurrence)
+
+
+class TodoRowIterable(ValuesListIterable):
+    def __iter__(self):
+        for values in super().__iter__():
+            yield TodoRow(*values)
+
+
+def todo_rows(queryset):
+    """``queryset`` of todos, yielding TodoRow objects instead of instances."""
+    queryset = queryset.annotate(
+        description_excerpt=Substr('description', 1, DESCRIPTION_EXCERPT_CHARS),
+        description_truncated=GreaterThan(Length('description'), DESCRIPTION_EXCERPT_CHARS),
+    ).values_list(*ROW_FIELDS)
+    # _iterable_class is private, but it is how values_list() itself picks
+    # its iterable; QuerySet._clone() carries it over to chained querysets.
+    # ReadModelTest pins this behaviour.
+    queryset._iterable_class = TodoRowIterable
+    return queryset
+
+
+def attach_tags(rows):
+    """Fill in every row's tags with one query."""
+    by_pk = {row.pk: row for row in rows}
+    if by_pk:
+        links = TodoItemTag.objects.filter(item_id__in=by_pk).order_by('tag__name')
+        for item_id, name in links.values_list('item_id', 'tag__name'):
+            by_pk[item_id].tags.append(TagRow(name))
+    return rows
+
+
+def complete_descriptions(rows):
+    """Load the full description of rows whose excerpt is too short for a card."""
+    cut = {row.pk: row for row in rows if row.description_cut}
+    if cut:
+        for pk, description in TodoItem.all_objects.filter(pk__in=cut).values_list('pk', 'description'):
+            cut[pk].description = description
+            cut[pk].description_cut = False
+    return rows
@@ -0,0 +1,54 @@
+"""
+Database routing between the primary and read replicas.
+
+Every read goes to the primary unless the current context has been
+unpinned. ``todo.middleware.ReplicaPinningMiddleware`` unpins safe requests,
+except for a short window after a session wrote, and any write pins the
+rest of the request again. Management commands and other background work
+never touch the middleware, so they always read from the primary.
+"""
+
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+
+PRIMARY = 'default'
+
+_pinned = ContextVar('todo_pinned_to_primary', default=True)
+
+
+def pin_to_primary():
+    """Send every read in the current context to the primary."""
+    _pinned.set(True)
+
+
+def unpin():
+    """Let reads in the current context go to a replica."""
+    _pinned.set(False)
+
+
+def is_pinned():
+    return _pinned.get()
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = getattr(settings, 'REPLICA_DATABASES', [])
+        if is_pinned() or not replicas:
+            return PRIMARY
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        # Anything read after a write in this request must see that write.
+        pin_to_primary()
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, *getattr(settings, 'REPLICA_DATABASES', [])}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return True
@@ -0,0 +1,151 @@
+"""
+Due-date scheduler for todos.
+
+Upcoming due dates are loaded through the indexed ``(completed, due_at)``
+range query into a min-heap, and the scheduler sleeps until the earliest of
+the next due date and the next window refresh instead of scanning the table
+on a fixed tick.
+"""
+
+import heapq
+import time
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import history
+from .models import TodoChange, TodoItem
+from .signals import todo_due
+
+
+class DueScheduler:
+    def __init__(self, lookahead=timedelta(minutes=5), refresh_interval=timedelta(seconds=60),
+                 batch_size=500, catch_up=timedelta(0), clock=timezone.now, sleep=time.sleep):
+        self.lookahead = lookahead
+        self.refresh_interval = refresh_interval
+        self.batch_size = batch_size
+        self.clock = clock
+        self.sleep = sleep
+        self._heap = []
+        self._scheduled = set()
+        self._fired = set()
+        self._next_refresh = None
+        # Due dates after window_start are (re)read on the next refresh; ones
+        # at or before it have been loaded already, or predate startup.
+        self.window_start = clock() - catch_up
+
+    @staticmethod
+    def by_due_date():
+        """
+        Todos to be filtered on ``due_at``. ``completed__in`` matches every
+        todo, but it lets the (completed, due_at) index serve the due_at
+        range instead of a table scan, so do not drop it.
+        """
+        return TodoItem.objects.filter(completed__in=[False, True]).order_by()
+
+    def due_queryset(self, start, end):
+        return self.by_due_date().filter(due_at__gt=start, due_at__lte=end)
+
+    def refresh(self, now):
+        """Load the due dates in the lookahead window into the heap."""
+        window = self.due_queryset(self.window_start, now + self.lookahead)
+        for pk, due_at in window.values_list('pk', 'due_at').iterator():
+            self.schedule(pk, due_at)
+        # Todos created since the last refresh may already be due, so the
+        # next window starts here rather than at the end of this one.
+        self.window_start = now
+        self._fired = {key for key in self._fired if key[1] > now}
+        self._next_refresh = now + self.refresh_interval
+
+    def schedule(self, pk, due_at):
+        key = (pk, due_at)
+        if key not in self._scheduled and key not in self._fired:
+            self._scheduled.add(key)
+            heapq.heappush(self._heap, (due_at, pk))
+
+    def next_wakeup(self):
+        if self._heap and self._heap[0][0] < self._next_refresh:
+            return self._heap[0][0]
+        return self._next_refresh
+
+    def run_pending(self, now):
+        """Fire everything in the heap that is due at ``now``; return the count."""
+        fired = 0
+        while self._heap and self._heap[0][0] <= now:
+            batch = []
+            while self._heap and self._heap[0][0] <= now and len(batch) < self.batch_size:
+                due_at, pk = heapq.heappop(self._heap)
+                self._scheduled.discard((pk, due_at))
+                self._fired.add((pk, due_at))
+                batch.append((pk, due_at))
+            fired += self.fire(batch, now)
+        return fired
+
+    def fire(self, batch, now):
+        expected = dict(batch)
+        # Re-read the rows: they may have been edited since they were loaded.
+        items = [
+            item for item in TodoItem.objects.filter(pk__in=expected)
+            if item.due_at == expected[item.pk]
+        ]
+        overdue = [item for item in items if not item.completed]
+        if overdue:
+            todo_due.send(sender=TodoItem, items=overdue)
+        for successor in self.materialize([item for item in items if item.recurrence], now):
+            if successor.pk is not None and successor.due_at <= now + self.lookahead:
+                self.schedule(successor.pk, successor.due_at)
+        return len(items)
+
+    def materialize(self, items, now):
+        """
+        Create the next occurrence of each recurring todo in one batch. The
+        recurrence rule moves to the new occurrence, so each todo spawns at
+        most one successor even if it is fired again after a restart.
+        """
+        if not items:
+            return []
+        successors = [
+            TodoItem(
+                title=item.title,
+                description=item.description,
+                priority=item.priority,
+                recurrence=item.recurrence,
+                due_at=item.next_occurrence(after=now),
+                todo_list_id=item.todo_list_id,
+                parent_id=item.parent_id,
+            )
+            for item in items
+        ]
+        with transaction.atomic():
+            TodoItem.objects.bulk_create(successors, batch_size=self.batch_size)
+            TodoItem.objects.filter(pk__in=[item.pk for item in items]).update(recurrence='')
+            history.record_created(successors, actor='scheduler')
+            history.record(
+                [(item.pk, TodoChange.Action.UPDATED, {'recurrence': [item.recurrence, '']}) for item in items],
+                actor='scheduler',
+            )
+        return successors
+
+    def catch_up_recurring(self, now):
+        """Materialize recurring todos that came due while nothing was running."""
+        queryset = self.by_due_date().filter(due_at__lte=self.window_start).exclude(recurrence='')
+        created = 0
+        while True:
+            items = list(queryset[:self.batch_size])
+            if not items:
+                return created
+            created += len(self.materialize(items, now))
+
+    def run(self, once=False):
+        self.catch_up_recurring(self.clock())
+        while True:
+            now = self.clock()
+            if self._next_refresh is None or now >= self._next_refresh:
+                self.refresh(now)
+            self.run_pending(now)
+            if once:
+                return
+            delay = (self.next_wakeup() - self.clock()).total_seconds()
+            if delay > 0:
+                self.sleep(delay)
@@ -0,0 +1,28 @@
+from django.db.models import OuterRef, Subquery
+from django.db.models.signals import m2m_changed
+from django.dispatch import Signal, receiver
+
+from .models import TodoItem, TodoItemTag
+from .tags import invalidate_tag_counts
+
+# Sent by the due-date scheduler with ``items``, the open todos that just
+# became due.
+todo_due = Signal()
+
+
+@receiver(m2m_changed, sender=TodoItemTag)
+def sync_tag_links(sender, instance, action, reverse, pk_set, using, **kwargs):
+    if action == 'post_add' and pk_set:
+        # Links made with tags.add() are bulk-inserted with the current time;
+        # give them their todo's creation date so they sort in the index.
+        links = TodoItemTag.objects.using(using)
+        if reverse:
+            links.filter(tag=instance, item_id__in=pk_set).update(
+                created_at=Subquery(
+                    TodoItem.objects.filter(pk=OuterRef('item_id')).values('created_at')[:1]
+                ),
+            )
+        else:
+            links.filter(item=instance, tag_id__in=pk_set).update(created_at=instance.created_at)
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_tag_counts()
@@ -0,0 +1,33 @@
+"""
+Tag counts for the list page sidebar.
+
+Counting every tag's todos is a grouped scan of the link table, so the
+result is cached for ``TODO_TAG_COUNTS_TIMEOUT`` seconds and dropped
+whenever tags are added to or removed from a todo, or todos are deleted
+or restored.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+TAG_COUNTS_CACHE_KEY = 'todo:tag-counts'
+
+
+def tag_counts():
+    """``(name, count)`` pairs for every tag in use, most used first."""
+    counts = cache.get(TAG_COUNTS_CACHE_KEY)
+    if counts is None:
+        from .models import Tag
+        counts = list(
+            Tag.objects.annotate(count=Count('item_links', filter=Q(item_links__item__deleted_at__isnull=True)))
+            .filter(count__gt=0)
+            .order_by('-count', 'name')
+            .values_list('name', 'count')
+        )
+        cache.set(TAG_COUNTS_CACHE_KEY, counts, getattr(settings, 'TODO_TAG_COUNTS_TIMEOUT', 60))
+    return counts
+
+
+def invalidate_tag_counts():
+    cache.delete(TAG_COUNTS_CACHE_KEY)
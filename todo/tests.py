@@ -1,10 +1,43 @@
-from django.test import TestCase, Client
+from django.test import TestCase, TransactionTestCase, Client, RequestFactory, override_settings
+from django.http import HttpResponse, StreamingHttpResponse
+import gzip
+import json
+import os
+import tempfile
+import subprocess
+import sys
+import threading
+import time
+from io import StringIO
+from unittest import mock
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.contrib.messages import get_messages
 from django.utils import timezone
 from datetime import timedelta
-from .models import TodoItem
+from .models import Tag, TodoChange, TodoItem, TodoItemTag, TodoList
+from .tree import rollup
+from .tags import tag_counts
 from .forms import TodoItemForm
+from . import batching
+from . import history
+from . import views
+from .views import TodoListView
+from .coalescing import SingleFlight
+from .batching import WriteBehindFull, WriteBehindQueue
+from . import routers
+from . import middleware
+from .readmodel import DESCRIPTION_EXCERPT_CHARS, TodoRow, complete_descriptions, todo_rows
+from .importer import default_rules, import_todos, split_ranges, validate_row
+from .scheduler import DueScheduler
+from .signals import todo_due
+from .middleware import (
+    PIN_COOKIE, CompressionMiddleware, ReplicaPinningMiddleware, TokenBucketLimiter, minify_html,
+)
 
 
 class TodoItemModelTest(TestCase):
@@ -112,7 +145,10 @@ class TodoItemFormTest(TestCase):
     def test_todo_item_form_fields(self):
         """Test that form has correct fields"""
         form = TodoItemForm()
-        expected_fields = ['title', 'description', 'completed']
+        expected_fields = [
+            'title', 'description', 'completed', 'due_at', 'priority', 'recurrence', 'todo_list', 'parent',
+            'tags'
+        ]
         self.assertEqual(list(form.fields.keys()), expected_fields)
     
     def test_todo_item_form_widgets(self):
@@ -434,3 +470,1225 @@ class TodoItemPerformanceTest(TestCase):
         
         self.assertEqual(completed_count, 500)
         self.assertLess(filter_time, 0.1)
+
+
+class WriteBehindQueueTest(TransactionTestCase):
+    """Test cases for the write-behind batching queue"""
+    
+    def tearDown(self):
+        batching._default_queue = None
+    
+    def test_flush_writes_pending_items(self):
+        """Test that pending items are inserted when flushed"""
+        write_behind = WriteBehindQueue(TodoItem, batch_size=10, flush_interval=5).start()
+        futures = [write_behind.submit(TodoItem(title=f"Queued {i}")) for i in range(25)]
+        write_behind.flush(timeout=5)
+        
+        self.assertEqual(TodoItem.objects.count(), 25)
+        self.assertTrue(all(f.done() and f.result().pk for f in futures))
+        write_behind.stop()
+    
+    def test_submit_and_wait_returns_saved_instance(self):
+        """Test the synchronous flush-and-wait path returns an id"""
+        write_behind = WriteBehindQueue(TodoItem, flush_interval=5).start()
+        todo = write_behind.submit(TodoItem(title="Needs an id"), wait=True, timeout=5)
+        
+        self.assertIsNotNone(todo.pk)
+        self.assertEqual(TodoItem.objects.get(pk=todo.pk).title, "Needs an id")
+        write_behind.stop()
+    
+    def test_flush_interval_writes_partial_batch(self):
+        """Test that a partial batch is written once the interval elapses"""
+        write_behind = WriteBehindQueue(TodoItem, batch_size=100, flush_interval=0.01).start()
+        future = write_behind.submit(TodoItem(title="Timed flush"))
+        
+        self.assertIsNotNone(future.result(timeout=5).pk)
+        write_behind.stop()
+    
+    def test_failed_batch_falls_back_to_single_rows(self):
+        """Test that one bad row is logged and dropped without losing its batch"""
+        write_behind = WriteBehindQueue(TodoItem, batch_size=10, flush_interval=5).start()
+        good = [write_behind.submit(TodoItem(title=f"Good {i}")) for i in range(3)]
+        bad = write_behind.submit(TodoItem(title=None))
+        with self.assertLogs('todo.batching', 'ERROR') as logs:
+            write_behind.flush(timeout=5)
+        
+        self.assertIn('batch of 4 failed', logs.output[0])
+        self.assertEqual(TodoItem.objects.count(), 3)
+        self.assertTrue(all(future.result().pk for future in good))
+        self.assertIsNotNone(bad.exception())
+        self.assertEqual(TodoChange.objects.count(), 0)
+        write_behind.stop()
+    
+    def test_flush_timeout_covers_a_full_buffer(self):
+        """Test that flush(timeout=...) does not block forever on a full buffer"""
+        writing, release = threading.Event(), threading.Event()
+        
+        def on_write(objs):
+            writing.set()
+            release.wait(5)
+        
+        write_behind = WriteBehindQueue(TodoItem, max_pending=1, flush_interval=0, on_write=on_write).start()
+        write_behind.submit(TodoItem(title="Writing"))
+        writing.wait(5)
+        write_behind.submit(TodoItem(title="Waiting"))
+        with self.assertRaises(TimeoutError):
+            write_behind.flush(timeout=0.05)
+        release.set()
+        write_behind.stop(timeout=5)
+        self.assertEqual(TodoItem.objects.count(), 2)
+    
+    def test_backpressure_when_full(self):
+        """Test that submitting to a full buffer raises after the timeout"""
+        write_behind = WriteBehindQueue(TodoItem, max_pending=2, put_timeout=0.01)
+        write_behind.submit(TodoItem(title="One"))
+        write_behind.submit(TodoItem(title="Two"))
+        
+        with self.assertRaises(WriteBehindFull):
+            write_behind.submit(TodoItem(title="Three"))
+        self.assertEqual(TodoItem.objects.count(), 0)
+    
+    def test_stop_flushes_pending_items(self):
+        """Test that stopping the queue writes everything still buffered"""
+        write_behind = WriteBehindQueue(TodoItem, batch_size=1000, flush_interval=60).start()
+        for i in range(5):
+            write_behind.submit(TodoItem(title=f"Shutdown {i}"))
+        write_behind.stop(timeout=5)
+        
+        self.assertEqual(TodoItem.objects.count(), 5)
+    
+    @override_settings(TODO_WRITE_BEHIND={'ENABLED': True, 'FLUSH_INTERVAL_MS': 10})
+    def test_add_todo_view_uses_queue(self):
+        """Test that AddTodoView enqueues creates when write-behind is enabled"""
+        response = self.client.post(reverse('todo:add_todo'), {
+            'title': 'Batched Todo',
+            'description': '',
+        })
+        self.assertRedirects(response, reverse('todo:todo_list'))
+        
+        batching.get_write_behind_queue().stop(timeout=5)
+        self.assertTrue(TodoItem.objects.filter(title='Batched Todo').exists())
+    
+    @override_settings(TODO_WRITE_BEHIND={'ENABLED': True, 'FLUSH_INTERVAL_MS': 10})
+    def test_queued_subtask_joins_parent_list(self):
+        """Test that write-behind subtasks inherit their parent's list like direct saves"""
+        parent = TodoItem.objects.create(title="Parent", todo_list=TodoList.objects.create(name="Work"))
+        self.client.post(reverse('todo:add_todo'), {'title': 'Queued subtask', 'parent': parent.pk})
+        batching.get_write_behind_queue().stop(timeout=5)
+        self.client.post(reverse('todo:add_todo'), {'title': 'Direct subtask', 'parent': parent.pk, 'tags': 'x'})
+        
+        queued = TodoItem.objects.get(title='Queued subtask')
+        direct = TodoItem.objects.get(title='Direct subtask')
+        self.assertEqual((queued.parent_id, queued.todo_list_id), (parent.pk, parent.todo_list_id))
+        self.assertEqual(direct.todo_list_id, parent.todo_list_id)
+    
+    @override_settings(TODO_WRITE_BEHIND={'ENABLED': True, 'FLUSH_INTERVAL_MS': 10})
+    def test_add_todo_view_leaves_object_unset_when_queued(self):
+        """Test that the queue's Future never ends up in self.object"""
+        seen = {}
+        
+        class RecordingAddTodoView(views.AddTodoView):
+            def form_valid(self, form):
+                response = super().form_valid(form)
+                seen['object'] = self.object
+                return response
+        
+        request = RequestFactory().post(reverse('todo:add_todo'), {'title': 'Queued Todo'})
+        response = RecordingAddTodoView.as_view()(request)
+        self.assertEqual(response.status_code, 302)
+        self.assertIsNone(seen['object'])
+        batching.get_write_behind_queue().stop(timeout=5)
+        self.assertTrue(TodoItem.objects.filter(title='Queued Todo').exists())
+
+
+@override_settings(REPLICA_DATABASES=['replica1'], REPLICA_PIN_SECONDS=5)
+class ReplicaRoutingTest(TestCase):
+    """Test cases for primary/replica database routing"""
+    
+    def setUp(self):
+        self.router = routers.PrimaryReplicaRouter()
+        self.factory = RequestFactory()
+        routers.unpin()
+    
+    def tearDown(self):
+        routers.pin_to_primary()
+    
+    def run_middleware(self, request):
+        """Run the pinning middleware and record where reads were routed"""
+        seen = {}
+        
+        def get_response(request):
+            seen['read_db'] = self.router.db_for_read(TodoItem)
+            return HttpResponse()
+        
+        response = ReplicaPinningMiddleware(get_response)(request)
+        return response, seen['read_db']
+    
+    def test_reads_go_to_replica(self):
+        """Test that unpinned reads are routed to a replica"""
+        self.assertEqual(self.router.db_for_read(TodoItem), 'replica1')
+    
+    def test_writes_go_to_primary_and_pin(self):
+        """Test that writes use the primary and pin later reads to it"""
+        self.assertEqual(self.router.db_for_write(TodoItem), 'default')
+        self.assertEqual(self.router.db_for_read(TodoItem), 'default')
+    
+    @override_settings(REPLICA_DATABASES=[])
+    def test_reads_without_replicas(self):
+        """Test that reads fall back to the primary when no replicas exist"""
+        self.assertEqual(self.router.db_for_read(TodoItem), 'default')
+    
+    def test_get_request_reads_from_replica(self):
+        """Test that a plain GET is served from a replica"""
+        response, read_db = self.run_middleware(self.factory.get('/'))
+        self.assertEqual(read_db, 'replica1')
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+    
+    def test_post_request_pins_session(self):
+        """Test that a POST reads from the primary and sets the pin cookie"""
+        response, read_db = self.run_middleware(self.factory.post('/'))
+        self.assertEqual(read_db, 'default')
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], 5)
+        self.assertTrue(routers.is_pinned())
+    
+    def test_pinned_get_reads_from_primary(self):
+        """Test read-your-writes for GETs inside the pin window"""
+        request = self.factory.get('/')
+        request.COOKIES[PIN_COOKIE] = '1'
+        response, read_db = self.run_middleware(request)
+        self.assertEqual(read_db, 'default')
+    
+    def test_pinned_stream_reads_cards_from_primary(self):
+        """Test that /all/ keeps the pin while its cards stream"""
+        TodoItem.objects.create(title="Fresh Todo")
+        request = self.factory.get(reverse('todo:todo_list_all'))
+        request.COOKIES[PIN_COOKIE] = '1'
+        response = ReplicaPinningMiddleware(views.TodoListStreamView.as_view())(request)
+        self.assertIn('Fresh Todo', b''.join(response.streaming_content).decode())
+    
+    def test_reads_outside_requests_use_primary(self):
+        """Test that background work reads from the primary by default"""
+        seen = []
+        thread = threading.Thread(target=lambda: seen.append(self.router.db_for_read(TodoItem)))
+        thread.start()
+        thread.join()
+        self.assertEqual(seen, ['default'])
+        self.run_middleware(self.factory.get('/'))
+        self.assertEqual(self.router.db_for_read(TodoItem), 'default')
+
+
+@override_settings(TODO_RESPONSE_COMPRESSION={'ENABLED': True, 'MIN_SIZE': 100, 'ENCODINGS': ['br', 'gzip']})
+class ResponsePipelineTest(TestCase):
+    """Test cases for HTML minification and response compression"""
+    
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.body = ('<div>\n' + '    <p>Todo</p>\n' * 50 + '</div>').encode()
+    
+    def compress(self, response, accept_encoding):
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        return CompressionMiddleware(lambda request: response)(request)
+    
+    def test_minify_collapses_whitespace(self):
+        """Test that indentation and comments are collapsed"""
+        html = '<ul>\n    <li>One</li>\n    <!-- note -->\n    <li>Two</li>\n</ul>'
+        self.assertEqual(minify_html(html), '<ul> <li>One</li> <li>Two</li> </ul>')
+    
+    def test_minify_preserves_textarea_and_pre(self):
+        """Test that whitespace-sensitive elements are left untouched"""
+        html = '<div>\n  <textarea>  keep\n  this </textarea>\n<pre>a\n   b</pre>  </div>'
+        self.assertEqual(
+            minify_html(html),
+            '<div> <textarea>  keep\n  this </textarea> <pre>a\n   b</pre> </div>'
+        )
+    
+    def test_minify_preserves_attribute_values(self):
+        """Test that whitespace inside quoted attribute values is kept"""
+        html = '<input\n    type="text"  value="Call  Bob" title=\'a\n b\'>\n  <p>x</p>'
+        self.assertEqual(minify_html(html), '<input type="text" value="Call  Bob" title=\'a\n b\'> <p>x</p>')
+    
+    def test_edit_page_keeps_input_values(self):
+        """Test that a minified edit form posts back the stored title and tags"""
+        todo = TodoItem.objects.create(title="Call  Bob")
+        todo.tags.add(Tag.objects.create(name="two  words"))
+        response = self.client.get(reverse('todo:edit_todo', args=[todo.pk]))
+        self.assertTemplateUsed(response, 'todo/edit_todo.html')
+        self.assertContains(response, 'value="Call  Bob"')
+        self.assertContains(response, 'value="two  words"')
+    
+    def test_list_view_is_minified(self):
+        """Test that rendered pages no longer carry template indentation"""
+        TodoItem.objects.create(title="Minified Todo")
+        response = self.client.get(reverse('todo:todo_list'))
+        self.assertContains(response, "Minified Todo")
+        self.assertNotIn(b'\n    ', response.content)
+    
+    def test_gzip_negotiation(self):
+        """Test that gzip is used when it is the only accepted coding"""
+        response = self.compress(HttpResponse(self.body), 'gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), self.body)
+        self.assertIn('Accept-Encoding', response['Vary'])
+    
+    def test_brotli_preferred(self):
+        """Test that brotli wins when available and accepted"""
+        if middleware.brotli is None:
+            self.skipTest('Brotli is not installed')
+        response = self.compress(HttpResponse(self.body), 'gzip, deflate, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(middleware.brotli.decompress(response.content), self.body)
+    
+    def test_rejected_coding_is_not_used(self):
+        """Test that q=0 codings and identity-only clients are respected"""
+        response = self.compress(HttpResponse(self.body), 'br;q=0, gzip;q=0')
+        self.assertFalse(response.has_header('Content-Encoding'))
+    
+    def test_small_response_is_not_compressed(self):
+        """Test the minimum size threshold"""
+        response = self.compress(HttpResponse(b'<p>tiny</p>'), 'gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+    
+    def test_streaming_response_is_compressed(self):
+        """Test gzip compression of a streaming response"""
+        chunks = [b'<p>chunk %d</p>\n' % i for i in range(20)]
+        response = self.compress(StreamingHttpResponse(iter(chunks)), 'gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), b''.join(chunks))
+
+
+@override_settings(TODO_LIST_PAGE_SIZE=2)
+class LazyTodoListTest(TestCase):
+    """Test cases for lazy list rendering, card fragments and streaming"""
+    
+    def setUp(self):
+        self.todos = [TodoItem.objects.create(title=f"Lazy Todo {i}") for i in range(5)]
+        self.newest_first = [todo.title for todo in reversed(self.todos)]
+    
+    def test_list_renders_first_page(self):
+        """Test that only the first page of cards is rendered"""
+        response = self.client.get(reverse('todo:todo_list'))
+        self.assertEqual([todo.title for todo in response.context['todos']], self.newest_first[:2])
+        self.assertContains(response, 'id="todo-more"')
+        self.assertContains(response, reverse('todo:todo_list_all'))
+    
+    def test_fragments_page_through_everything(self):
+        """Test that following fragment cursors yields every todo once"""
+        response = self.client.get(reverse('todo:todo_list'))
+        titles = [todo.title for todo in response.context['todos']]
+        next_url = response.context['next_page_url']
+        while next_url:
+            response = self.client.get(next_url)
+            self.assertTemplateUsed(response, 'todo/todo_cards.html')
+            self.assertNotContains(response, '<html')
+            titles += [todo.title for todo in response.context['todos']]
+            next_url = response.context.get('next_page_url')
+        self.assertEqual(titles, self.newest_first)
+    
+    def test_invalid_cursor(self):
+        """Test that a malformed cursor is a 404"""
+        response = self.client.get(reverse('todo:todo_cards'), {'after': 'nope'})
+        self.assertEqual(response.status_code, 404)
+    
+    def test_stream_view_lists_everything(self):
+        """Test that the no-JS fallback streams every card inside the page shell"""
+        response = self.client.get(reverse('todo:todo_list_all'))
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode()
+        positions = [content.index(title) for title in self.newest_first]
+        self.assertEqual(positions, sorted(positions))
+        self.assertIn('</html>', content)
+        self.assertNotIn('<!-- todo-cards -->', content)
+    
+    def test_stream_view_keeps_filters(self):
+        """Test that the no-JS fallback link and stream honour ?list= and ?tag="""
+        work = TodoList.objects.create(name="Work")
+        TodoItem.objects.filter(pk__in=[todo.pk for todo in self.todos[:3]]).update(todo_list=work)
+        self.todos[0].tags.add(Tag.objects.create(name="urgent"))
+        response = self.client.get(reverse('todo:todo_list'), {'list': work.pk})
+        self.assertContains(response, '%s?list=%d' % (reverse('todo:todo_list_all'), work.pk))
+        
+        content = b''.join(self.client.get(reverse('todo:todo_list_all'), {'list': work.pk}).streaming_content).decode()
+        self.assertEqual([title for title in self.newest_first if title in content], self.newest_first[2:])
+        content = b''.join(self.client.get(reverse('todo:todo_list_all'), {'tag': 'urgent'}).streaming_content).decode()
+        self.assertEqual([title for title in self.newest_first if title in content], ["Lazy Todo 0"])
+        self.assertIn('Tagged <strong>urgent</strong>', content)
+    
+    def test_stream_view_empty(self):
+        """Test the streaming fallback with no todos"""
+        TodoItem.objects.all().delete()
+        response = self.client.get(reverse('todo:todo_list_all'))
+        self.assertContains(response, 'No todos yet!')
+
+
+class StartupTimeTest(TestCase):
+    """Test cold-start cost of workers and the slimmed settings profiles"""
+    
+    COLD_START_BUDGET = 2.0  # seconds
+    
+    def run_python(self, code, settings_module='todoproject.settings'):
+        """Run code in a fresh interpreter and return its stdout"""
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings_module)
+        result = subprocess.run(
+            [sys.executable, '-c', code], env=env, capture_output=True, text=True,
+            cwd=settings.BASE_DIR, check=True,
+        )
+        return result.stdout.strip()
+    
+    def test_wsgi_cold_start_within_budget(self):
+        """Test that importing the WSGI application stays under budget"""
+        elapsed = float(self.run_python(
+            'import time; start = time.perf_counter(); import todoproject.wsgi; '
+            'print(time.perf_counter() - start)'
+        ))
+        self.assertLess(elapsed, self.COLD_START_BUDGET)
+    
+    def test_slim_profiles_skip_unused_apps(self):
+        """Test that API and worker profiles serve requests without admin, sessions, messages or staticfiles"""
+        # The request loads the URLconf and todo.views, as a running worker
+        # would; a 404 needs no database.
+        code = (
+            'import sys, django; django.setup(); import todoproject.wsgi; '
+            'from django.apps import apps; from django.test import Client; '
+            'status = Client().get("/no-such-page/").status_code; '
+            'apps_ = ("django.contrib.admin", "django.contrib.sessions", "django.contrib.messages", '
+            '"django.contrib.staticfiles"); '
+            'print(status, "todo.views" in sys.modules, [a for a in apps_ if apps.is_installed(a)], '
+            'sorted(m for m in ("django.contrib.admin", "django.contrib.staticfiles") if m in sys.modules))'
+        )
+        self.assertEqual(self.run_python(code, 'todoproject.settings_api'), '404 True [] []')
+        self.assertEqual(self.run_python(code, 'todoproject.settings_worker'), '404 True [] []')
+    
+    def test_profile_imports_command(self):
+        """Test that the import profiler reports hot spots"""
+        out = StringIO()
+        call_command('profile_imports', '--limit', '3', stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertIn('Cold start of todoproject.wsgi', lines[0])
+        self.assertEqual(len(lines), 5)
+
+
+class DueSchedulerTest(TestCase):
+    """Test cases for due dates, recurrence and the due-date scheduler"""
+    
+    def setUp(self):
+        self.now = timezone.now().replace(microsecond=0)
+        self.fired = []
+        todo_due.connect(self.on_due)
+    
+    def tearDown(self):
+        todo_due.disconnect(self.on_due)
+    
+    def on_due(self, sender, items, **kwargs):
+        self.fired.extend(item.title for item in items)
+    
+    def make_scheduler(self, **kwargs):
+        return DueScheduler(clock=lambda: self.now, **kwargs)
+    
+    def test_next_occurrence(self):
+        """Test daily, weekly and month-end clamped monthly recurrence"""
+        due = timezone.make_aware(timezone.datetime(2025, 1, 31, 9, 0))
+        daily = TodoItem(title="Daily", due_at=due, recurrence=TodoItem.Recurrence.DAILY)
+        weekly = TodoItem(title="Weekly", due_at=due, recurrence=TodoItem.Recurrence.WEEKLY)
+        monthly = TodoItem(title="Monthly", due_at=due, recurrence=TodoItem.Recurrence.MONTHLY)
+        
+        self.assertEqual(daily.next_occurrence(), due + timedelta(days=1))
+        self.assertEqual(daily.next_occurrence(after=due + timedelta(days=3, hours=1)), due + timedelta(days=4))
+        self.assertEqual(weekly.next_occurrence(), due + timedelta(days=7))
+        self.assertEqual(monthly.next_occurrence(), due.replace(month=2, day=28))
+        self.assertIsNone(TodoItem(title="Once", due_at=due).next_occurrence())
+    
+    def test_recurrence_requires_due_date(self):
+        """Test that a recurring todo without a due date is rejected"""
+        form = TodoItemForm(data={'title': 'Repeat', 'recurrence': 'daily'})
+        self.assertFalse(form.is_valid())
+        self.assertIn('recurrence', form.errors)
+    
+    def test_fires_due_items_only_once(self):
+        """Test that due open todos fire once and later ones wait"""
+        scheduler = self.make_scheduler(catch_up=timedelta(minutes=1))
+        TodoItem.objects.create(title="Due now", due_at=self.now - timedelta(seconds=5))
+        TodoItem.objects.create(title="Done", due_at=self.now - timedelta(seconds=5), completed=True)
+        TodoItem.objects.create(title="Later", due_at=self.now + timedelta(seconds=30))
+        TodoItem.objects.create(title="Far future", due_at=self.now + timedelta(days=1))
+        
+        scheduler.run(once=True)
+        self.assertEqual(self.fired, ["Due now"])
+        self.assertEqual(scheduler.next_wakeup(), self.now + timedelta(seconds=30))
+        
+        self.now += timedelta(seconds=30)
+        scheduler.run(once=True)
+        self.assertEqual(self.fired, ["Due now", "Later"])
+    
+    def test_refresh_picks_up_new_items(self):
+        """Test that todos created after a refresh are fired on the next one"""
+        scheduler = self.make_scheduler(refresh_interval=timedelta(seconds=10))
+        scheduler.run(once=True)
+        TodoItem.objects.create(title="Created later", due_at=self.now + timedelta(seconds=5))
+        
+        self.now += timedelta(seconds=10)
+        scheduler.run(once=True)
+        self.assertEqual(self.fired, ["Created later"])
+    
+    def test_recurring_items_materialize_once(self):
+        """Test that a due recurring todo spawns exactly one successor"""
+        scheduler = self.make_scheduler(catch_up=timedelta(minutes=1))
+        original = TodoItem.objects.create(
+            title="Standup", due_at=self.now - timedelta(seconds=1),
+            recurrence=TodoItem.Recurrence.DAILY, priority=TodoItem.Priority.HIGH,
+        )
+        scheduler.run(once=True)
+        scheduler.run(once=True)
+        
+        successor = TodoItem.objects.exclude(pk=original.pk).get()
+        self.assertEqual(successor.due_at, original.due_at + timedelta(days=1))
+        self.assertEqual(successor.recurrence, TodoItem.Recurrence.DAILY)
+        self.assertEqual(successor.priority, TodoItem.Priority.HIGH)
+        original.refresh_from_db()
+        self.assertEqual(original.recurrence, '')
+    
+    def test_catch_up_recurring_after_downtime(self):
+        """Test that recurring todos missed while stopped roll forward"""
+        TodoItem.objects.create(
+            title="Weekly review", due_at=self.now - timedelta(days=20),
+            recurrence=TodoItem.Recurrence.WEEKLY,
+        )
+        self.make_scheduler().run(once=True)
+        
+        successor = TodoItem.objects.get(title="Weekly review", recurrence=TodoItem.Recurrence.WEEKLY)
+        self.assertEqual(successor.due_at, self.now + timedelta(days=1))
+        self.assertEqual(self.fired, [])
+    
+    def test_run_todo_scheduler_command(self):
+        """Test the management command in --once mode"""
+        TodoItem.objects.create(title="Command due", due_at=timezone.now() - timedelta(seconds=5))
+        out = StringIO()
+        call_command('run_todo_scheduler', '--once', '--catch-up', '60', stdout=out)
+        self.assertIn('Due: Command due', out.getvalue())
+
+
+class BulkImportTest(TestCase):
+    """Test cases for the parallel bulk import pipeline"""
+    
+    ROWS = [
+        {'title': 'Valid Todo', 'description': '  padded  ', 'completed': 'true'},
+        {'title': '', 'description': 'Missing title'},
+        {'title': 'A' * 201},
+        {'title': '   '},
+        {'title': 'Checkbox false', 'completed': 'false'},
+        {'title': 'Spreadsheet false', 'completed': 'FALSE'},
+        {'title': 'Spreadsheet true', 'completed': 'TRUE'},
+        {'title': 'Due', 'due_at': '2025-03-01T09:30', 'priority': '3', 'recurrence': 'weekly'},
+        {'title': 'Bad date', 'due_at': 'tomorrow'},
+        {'title': 'Bad priority', 'priority': '9'},
+        {'title': 'Bad recurrence', 'due_at': '2025-03-01T09:30', 'recurrence': 'hourly'},
+        {'title': 'Repeats forever', 'recurrence': 'daily'},
+    ]
+    
+    def write_file(self, suffix, content):
+        handle = tempfile.NamedTemporaryFile('w', suffix=suffix, delete=False, encoding='utf-8')
+        with handle:
+            handle.write(content)
+        self.addCleanup(os.remove, handle.name)
+        return handle.name
+    
+    def write_jsonl(self, rows):
+        return self.write_file('.jsonl', ''.join(json.dumps(row) + '\n' for row in rows))
+    
+    def test_validator_matches_form(self):
+        """Test that the lightweight validator agrees with TodoItemForm in any time zone"""
+        for zone in ('UTC', 'America/New_York'):
+            with timezone.override(zone):
+                rules = default_rules()
+                for row in self.ROWS:
+                    with self.subTest(zone=zone, row=row):
+                        form = TodoItemForm(data=row)
+                        values, error = validate_row(row, rules)
+                        self.assertEqual(form.is_valid(), error is None)
+                        if values:
+                            cleaned = form.cleaned_data
+                            self.assertEqual(values, (
+                                cleaned['title'], cleaned['description'], cleaned['completed'],
+                                cleaned['due_at'], cleaned['priority'], cleaned['recurrence'],
+                            ))
+    
+    def test_split_ranges_cover_file_on_line_boundaries(self):
+        """Test that byte ranges tile the file and end on newlines"""
+        path = self.write_jsonl([{'title': f'Row {i}'} for i in range(100)])
+        ranges = split_ranges(path, chunk_bytes=64)
+        with open(path, 'rb') as handle:
+            data = handle.read()
+        self.assertEqual(ranges[0][0], 0)
+        self.assertEqual(ranges[-1][1], len(data))
+        for (start, end), (next_start, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(end, next_start)
+            self.assertEqual(data[end - 1:end], b'\n')
+    
+    def test_import_jsonl_in_process(self):
+        """Test a single-process import with rejected rows"""
+        result = import_todos(self.write_jsonl(self.ROWS + ['not an object']), workers=1, chunk_bytes=100)
+        self.assertEqual(result.imported, 5)
+        self.assertEqual(result.rejected, 8)
+        self.assertEqual(len(result.errors), 8)
+        self.assertEqual(TodoItem.objects.get(title='Valid Todo').description, 'padded')
+        self.assertFalse(TodoItem.objects.get(title='Checkbox false').completed)
+        self.assertFalse(TodoItem.objects.get(title='Spreadsheet false').completed)
+    
+    def test_import_with_process_pool(self):
+        """Test that a multi-process import loads every row exactly once"""
+        rows = [{'title': f'Pooled {i}', 'completed': i % 2 == 0} for i in range(500)]
+        result = import_todos(self.write_jsonl(rows), workers=2, chunk_bytes=1024)
+        self.assertEqual(result.imported, 500)
+        self.assertEqual(TodoItem.objects.filter(title__startswith='Pooled').count(), 500)
+        self.assertEqual(TodoItem.objects.filter(completed=True).count(), 250)
+    
+    def test_import_csv_command(self):
+        """Test the import_todos command with a CSV file"""
+        path = self.write_file('.csv', 'title,description,completed\nFirst,One,true\nSecond,,false\n,No title,\n')
+        out, err = StringIO(), StringIO()
+        call_command('import_todos', path, '--workers', '1', stdout=out, stderr=err)
+        self.assertIn('Imported 2 todos (1 rejected)', out.getvalue())
+        self.assertIn('title: This field is required.', err.getvalue())
+        self.assertTrue(TodoItem.objects.get(title='First').completed)
+
+
+class TodoTreeTest(TestCase):
+    """Test cases for todo lists, subtasks and materialized-path queries"""
+    
+    def setUp(self):
+        self.root = TodoItem.objects.create(title="Root")
+        self.child = TodoItem.objects.create(title="Child", parent=self.root)
+        self.grandchild = TodoItem.objects.create(title="Grandchild", parent=self.child, completed=True)
+        self.sibling = TodoItem.objects.create(title="Sibling", parent=self.root)
+    
+    def test_paths_and_depths(self):
+        """Test that paths nest the ancestors' primary keys"""
+        self.assertEqual(self.root.depth, 0)
+        self.assertEqual(self.grandchild.depth, 2)
+        self.assertTrue(self.grandchild.path.startswith(self.child.path))
+        self.assertTrue(self.child.path.startswith(self.root.path))
+        self.assertEqual(TodoItem.objects.get(pk=self.grandchild.pk).path, self.grandchild.path)
+    
+    def test_subtree_is_one_query_in_depth_first_order(self):
+        """Test fetching a subtree with rollups in a single query"""
+        other = TodoItem.objects.create(title="Other root")
+        TodoItem.objects.create(title="Other child", parent=other)
+        with self.assertNumQueries(1):
+            nodes = rollup(list(TodoItem.objects.subtree(self.root)))
+        self.assertEqual([node.title for node in nodes], ["Root", "Child", "Grandchild", "Sibling"])
+        self.assertEqual((nodes[0].subtask_count, nodes[0].subtasks_done), (3, 1))
+        self.assertEqual((nodes[1].subtask_count, nodes[1].subtasks_done), (1, 1))
+    
+    def test_bulk_create_assigns_paths(self):
+        """Test that bulk-created roots and subtasks get paths"""
+        roots = TodoItem.objects.bulk_create([TodoItem(title=f"Bulk root {i}") for i in range(3)])
+        children = TodoItem.objects.bulk_create([TodoItem(title="Bulk child", parent=roots[0])])
+        self.assertEqual(TodoItem.objects.get(pk=roots[2].pk).path, roots[2].path)
+        self.assertEqual(TodoItem.objects.get(pk=children[0].pk).depth, 1)
+        self.assertEqual(
+            [todo.title for todo in TodoItem.objects.subtree(roots[0])], ["Bulk root 0", "Bulk child"]
+        )
+    
+    def test_moving_a_subtree_rewrites_descendants(self):
+        """Test that re-parenting a todo moves its whole subtree"""
+        self.child.parent = self.sibling
+        self.child.save()
+        grandchild = TodoItem.objects.get(pk=self.grandchild.pk)
+        self.assertTrue(grandchild.path.startswith(self.sibling.path))
+        self.assertEqual(grandchild.depth, 3)
+        self.assertEqual(
+            [todo.title for todo in TodoItem.objects.subtree(self.sibling)],
+            ["Sibling", "Child", "Grandchild"]
+        )
+    
+    def test_cannot_become_own_subtask(self):
+        """Test that a todo cannot be moved under its own descendant"""
+        form = TodoItemForm(
+            data={'title': 'Root', 'parent': self.grandchild.pk}, instance=TodoItem.objects.get(pk=self.root.pk)
+        )
+        self.assertFalse(form.is_valid())
+        self.assertIn('parent', form.errors)
+    
+    def test_list_view_renders_subtasks_without_extra_queries(self):
+        """Test that subtasks are fetched in one query regardless of page size"""
+        url = reverse('todo:todo_list')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        # The next request resets the query log, so count now.
+        few = len(queries)
+        self.assertGreater(few, 0)
+        self.assertEqual([todo.title for todo in response.context['todos']], ["Root"])
+        self.assertContains(response, "Grandchild")
+        self.assertContains(response, "1/3 done")
+        
+        for i in range(5):
+            parent = TodoItem.objects.create(title=f"Extra root {i}")
+            TodoItem.objects.create(title=f"Extra child {i}", parent=parent)
+        with CaptureQueriesContext(connection) as many:
+            self.client.get(url)
+        self.assertEqual(few, len(many))
+    
+    def test_add_subtask(self):
+        """Test adding a subtask from its parent's card"""
+        todo_list = TodoList.objects.create(name="Work")
+        self.root.todo_list = todo_list
+        self.root.save()
+        response = self.client.get(reverse('todo:add_todo'), {'parent': self.root.pk})
+        self.assertEqual(response.context['form'].initial['parent'], self.root)
+        self.assertContains(response, "Subtask of")
+        
+        self.client.post(reverse('todo:add_todo'), {'title': 'New subtask', 'parent': self.root.pk})
+        subtask = TodoItem.objects.get(title='New subtask')
+        self.assertEqual(subtask.parent, self.root)
+        self.assertEqual(subtask.todo_list, todo_list)
+        self.assertEqual(subtask.depth, 1)
+    
+    def test_filter_by_list(self):
+        """Test that the list view can be limited to one todo list"""
+        todo_list = TodoList.objects.create(name="Home")
+        TodoItem.objects.create(title="Home todo", todo_list=todo_list)
+        response = self.client.get(reverse('todo:todo_list'), {'list': todo_list.pk})
+        self.assertEqual([todo.title for todo in response.context['todos']], ["Home todo"])
+        self.assertEqual(self.client.get(reverse('todo:todo_list'), {'list': 999}).status_code, 404)
+
+
+class TagTest(TestCase):
+    """Test cases for tagging todos and tag-filtered listing"""
+    
+    def setUp(self):
+        cache.clear()
+        self.work = Tag.objects.create(name="work")
+        self.home = Tag.objects.create(name="home")
+        self.older = TodoItem.objects.create(title="Older")
+        self.newer = TodoItem.objects.create(title="Newer")
+        self.older.tags.add(self.work)
+        self.newer.tags.add(self.work, self.home)
+    
+    def test_links_copy_the_todo_creation_date(self):
+        """Test that tag links sort like their todos"""
+        self.assertEqual(TodoItemTag.objects.get(item=self.older).created_at, self.older.created_at)
+        self.home.items.add(self.older)
+        self.assertEqual(
+            TodoItemTag.objects.get(item=self.older, tag=self.home).created_at, self.older.created_at
+        )
+    
+    def test_form_creates_and_sets_tags(self):
+        """Test that the form takes comma-separated tag names"""
+        response = self.client.post(reverse('todo:add_todo'), {'title': 'Tagged', 'tags': 'Work, errands, work'})
+        self.assertEqual(response.status_code, 302)
+        todo = TodoItem.objects.get(title='Tagged')
+        self.assertEqual(sorted(tag.name for tag in todo.tags.all()), ['errands', 'work'])
+        
+        form = TodoItemForm(instance=todo)
+        self.assertEqual(form.initial['tags'], 'errands, work')
+        self.client.post(reverse('todo:edit_todo', args=[todo.pk]), {'title': 'Tagged', 'tags': 'home'})
+        self.assertEqual([tag.name for tag in todo.tags.all()], ['home'])
+    
+    def test_filter_by_tag(self):
+        """Test that ?tag= lists tagged todos newest first, subtasks included"""
+        subtask = TodoItem.objects.create(title="Tagged subtask", parent=self.older)
+        subtask.tags.add(self.work)
+        TodoItem.objects.create(title="Untagged")
+        response = self.client.get(reverse('todo:todo_list'), {'tag': 'work'})
+        self.assertEqual(
+            [todo.title for todo in response.context['todos']], ["Tagged subtask", "Newer", "Older"]
+        )
+        self.assertEqual(response.context['current_tag'], self.work)
+        self.assertEqual(self.client.get(reverse('todo:todo_list'), {'tag': 'nope'}).status_code, 404)
+    
+    @override_settings(TODO_LIST_PAGE_SIZE=1)
+    def test_tag_pages_follow_the_link_index(self):
+        """Test keyset paging within a tag"""
+        response = self.client.get(reverse('todo:todo_list'), {'tag': 'work'})
+        self.assertEqual([todo.title for todo in response.context['todos']], ["Newer"])
+        self.assertIn('tag=work', response.context['next_page_url'])
+        response = self.client.get(response.context['next_page_url'])
+        self.assertEqual([todo.title for todo in response.context['todos']], ["Older"])
+    
+    @override_settings(TODO_LIST_PAGE_SIZE=None)
+    def test_large_tag_listing(self):
+        """Test that subtasks of over a thousand tagged todos load in one query"""
+        roots = TodoItem.objects.bulk_create([TodoItem(title=f"Bulk {i}") for i in range(1200)])
+        children = TodoItem.objects.bulk_create([TodoItem(title=f"Child {i}", parent=roots[i]) for i in range(10)])
+        grandchild = TodoItem.objects.create(title="Grandchild", parent=children[0])
+        TodoItemTag.objects.bulk_create([TodoItemTag(item=todo, tag=self.work) for todo in roots + children])
+        expected = {
+            root.pk: [todo.pk for todo in TodoItem.objects.subtree(root, include_self=False)]
+            for root in roots[:10] + children[:1]
+        }
+        descendants = TodoItem.objects.descendants_of(roots + children)
+        self.assertEqual(descendants.count(), 11)
+        response = self.client.get(reverse('todo:todo_list'), {'tag': 'work'})
+        self.assertEqual(len(response.context['todos']), 1212)
+        for todo in response.context['todos']:
+            if todo.pk in expected:
+                self.assertEqual([subtask.pk for subtask in todo.subtasks], expected[todo.pk])
+        self.assertContains(response, grandchild.title)
+    
+    def test_cards_render_tags_without_per_card_queries(self):
+        """Test that tags for a page are prefetched in one query"""
+        url = reverse('todo:todo_list')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        few = len(queries)
+        self.assertGreater(few, 0)
+        self.assertContains(response, '?tag=home')
+        
+        for i in range(5):
+            TodoItem.objects.create(title=f"Extra {i}").tags.add(self.home)
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as many:
+            self.client.get(url)
+        self.assertEqual(few, len(many))
+    
+    def test_tag_counts_are_cached_and_invalidated(self):
+        """Test that the sidebar counts come from the cache until tags change"""
+        self.assertEqual(tag_counts(), [('work', 2), ('home', 1)])
+        with self.assertNumQueries(0):
+            tag_counts()
+        self.older.tags.add(self.home)
+        self.assertEqual(tag_counts(), [('home', 2), ('work', 2)])
+        self.newer.tags.clear()
+        self.assertEqual(tag_counts(), [('home', 1), ('work', 1)])
+    
+    def test_admin_filters_by_tag(self):
+        """Test the admin changelist tag filter"""
+        from django.contrib.auth.models import User
+        User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.login(username='admin', password='password')
+        response = self.client.get(reverse('admin:todo_todoitem_changelist'), {'tags__id__exact': self.home.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([todo.title for todo in response.context['cl'].result_list], ["Newer"])
+
+
+class SoftDeleteTest(TestCase):
+    """Test cases for soft delete, undo and the batched purge"""
+    
+    def setUp(self):
+        cache.clear()
+        self.root = TodoItem.objects.create(title="Root")
+        self.child = TodoItem.objects.create(title="Child", parent=self.root)
+        self.grandchild = TodoItem.objects.create(title="Grandchild", parent=self.child)
+        self.other = TodoItem.objects.create(title="Other")
+    
+    def expire(self, *todos):
+        TodoItem.all_objects.filter(pk__in=[todo.pk for todo in todos]).update(
+            deleted_at=timezone.now() - timedelta(days=8)
+        )
+    
+    def test_delete_view_is_one_update(self):
+        """Test that deleting a subtree issues a single UPDATE and no DELETE"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('todo:delete_todo', args=[self.root.pk]))
+        statements = [query['sql'].split()[0] for query in queries]
+        self.assertRedirects(response, reverse('todo:todo_list'))
+        self.assertEqual(statements.count('UPDATE'), 1)
+        self.assertNotIn('DELETE', statements)
+        self.assertEqual(list(TodoItem.objects.values_list('title', flat=True)), ["Other"])
+        self.assertEqual(TodoItem.all_objects.deleted().count(), 3)
+        self.assertEqual(self.client.get(reverse('todo:edit_todo', args=[self.child.pk])).status_code, 404)
+    
+    def test_undo_restores_the_subtree(self):
+        """Test that restoring brings back subtasks deleted with the todo only"""
+        self.grandchild.soft_delete()
+        self.root.soft_delete()
+        response = self.client.get(reverse('todo:deleted_todos'))
+        self.assertEqual([todo.title for todo in response.context['todos']], ["Root"])
+        
+        self.client.post(reverse('todo:restore_todo', args=[self.root.pk]))
+        self.assertEqual(
+            [todo.title for todo in TodoItem.objects.subtree(self.root)], ["Root", "Child"]
+        )
+        response = self.client.get(reverse('todo:deleted_todos'))
+        self.assertEqual([todo.title for todo in response.context['todos']], ["Grandchild"])
+    
+    def test_undo_expires_with_the_retention_window(self):
+        """Test that todos past the retention window cannot be restored"""
+        self.other.soft_delete()
+        self.expire(self.other)
+        response = self.client.post(reverse('todo:restore_todo', args=[self.other.pk]))
+        self.assertEqual(response.status_code, 404)
+    
+    def test_purge_in_batches(self):
+        """Test that purge_todos removes only expired todos, a batch at a time"""
+        self.root.soft_delete()
+        self.expire(self.root, self.child, self.grandchild)
+        self.other.tags.add(Tag.objects.create(name="kept"))
+        self.other.soft_delete()
+        out = StringIO()
+        call_command('purge_todos', batch_size=2, pause=0, stdout=out)
+        self.assertIn('Purged 3 todos in 2 batches', out.getvalue())
+        self.assertEqual(list(TodoItem.all_objects.values_list('title', flat=True)), ["Other"])
+        self.assertEqual(TodoItemTag.objects.count(), 1)
+    
+    def test_deleted_todos_leave_tag_counts(self):
+        """Test that tag counts ignore deleted todos"""
+        tag = Tag.objects.create(name="work")
+        self.root.tags.add(tag)
+        self.other.tags.add(tag)
+        self.assertEqual(tag_counts(), [('work', 2)])
+        self.client.post(reverse('todo:delete_todo', args=[self.root.pk]))
+        self.assertEqual(tag_counts(), [('work', 1)])
+    
+    def test_admin_delete_is_soft(self):
+        """Test that the admin delete action marks todos deleted"""
+        from django.contrib.auth.models import User
+        User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.login(username='admin', password='password')
+        self.client.post(reverse('admin:todo_todoitem_changelist'), {
+            'action': 'delete_selected', '_selected_action': [self.root.pk, self.other.pk], 'post': 'yes',
+        })
+        self.assertFalse(TodoItem.objects.exists())
+        self.assertEqual(TodoItem.all_objects.count(), 4)
+    
+    def test_admin_list_delete_soft_deletes_its_todos(self):
+        """Test that deleting a list in the admin keeps its todos restorable"""
+        from django.contrib.auth.models import User
+        User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.login(username='admin', password='password')
+        work = TodoList.objects.create(name="Work")
+        TodoItem.objects.filter(pk=self.root.pk).update(todo_list=work)
+        self.client.post(reverse('admin:todo_todolist_delete', args=[work.pk]), {'post': 'yes'})
+        self.assertFalse(TodoList.objects.exists())
+        self.assertEqual(list(TodoItem.objects.all()), [self.other])
+        self.assertEqual(TodoItem.all_objects.count(), 4)
+        self.assertEqual(self.root.changes.get().action, TodoChange.Action.DELETED)
+        self.root.refresh_from_db()
+        self.assertIsNone(self.root.todo_list_id)
+        self.client.post(reverse('todo:restore_todo', args=[self.root.pk]))
+        self.assertEqual(TodoItem.objects.count(), 4)
+    
+    def test_soft_delete_large_selection(self):
+        """Test that deleting over a thousand todos stays within SQLite's expression limits"""
+        from django.contrib.auth.models import User
+        User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.login(username='admin', password='password')
+        big = TodoList.objects.create(name="Big")
+        roots = TodoItem.objects.bulk_create([TodoItem(title=f"Bulk {i}", todo_list=big) for i in range(1100)])
+        TodoItem.objects.bulk_create([TodoItem(title=f"Bulk child {i}", parent=root) for i, root in enumerate(roots[:300])])
+        self.client.post(reverse('admin:todo_todolist_delete', args=[big.pk]), {'post': 'yes'})
+        self.assertEqual(TodoItem.all_objects.deleted().count(), 1400)
+        self.assertEqual(TodoChange.objects.filter(action=TodoChange.Action.DELETED).count(), 1400)
+        self.assertEqual(TodoItem.objects.count(), 4)
+        
+        TodoItem.objects.bulk_create([TodoItem(title=f"More {i}") for i in range(1100)])
+        self.assertIsNotNone(TodoItem.objects.filter(title__startswith="More").soft_delete())
+        self.assertEqual(TodoItem.objects.count(), 4)
+
+
+class ListCoalescingTest(TransactionTestCase):
+    """Test cases for single-flight coalescing of list requests"""
+    
+    def setUp(self):
+        cache.clear()
+        for i in range(3):
+            TodoItem.objects.create(title=f"Todo {i}")
+        self.factory = RequestFactory()
+        self.view = TodoListView.as_view()
+    
+    def get(self, path, statements):
+        def count(execute, sql, params, many, context):
+            statements.append(sql)
+            return execute(sql, params, many, context)
+        with connection.execute_wrapper(count):
+            return self.view(self.factory.get(path)).render().content
+    
+    def burst(self, size, path='/'):
+        """Send ``size`` concurrent GETs, holding the first query until all have arrived."""
+        statements, pages = [], [None] * size
+        arrived = threading.Event()
+        
+        def hold(execute, sql, params, many, context):
+            if not arrived.is_set():
+                deadline = time.monotonic() + 5
+                while views.list_flight.waiting((path, False)) < size - 1 and time.monotonic() < deadline:
+                    time.sleep(0.001)
+                arrived.set()
+            return execute(sql, params, many, context)
+        
+        def worker(index):
+            try:
+                with connection.execute_wrapper(hold):
+                    pages[index] = self.get(path, statements)
+            finally:
+                connection.close()
+        
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(size)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return statements, pages
+    
+    def test_burst_runs_one_set_of_queries(self):
+        """Test that a stampede of identical GETs reaches the database once"""
+        self.get('/', [])
+        single = []
+        page = self.get('/', single)
+        
+        statements, pages = self.burst(10)
+        self.assertEqual(len(statements), len(single))
+        self.assertEqual(pages, [page] * 10)
+        self.assertIn(b"Todo 2", page)
+        
+        statements, pages = self.burst(5)
+        self.assertEqual(len(statements), len(single))
+    
+    def test_different_requests_are_not_shared(self):
+        """Test that requests for different pages each run their own queries"""
+        todo_list = TodoList.objects.create(name="Work")
+        TodoItem.objects.create(title="Listed", todo_list=todo_list)
+        listed = self.get('/?list=%d' % todo_list.pk, [])
+        everything = self.get('/', [])
+        self.assertIn(b"Listed", listed)
+        self.assertNotIn(b"Todo 0", listed)
+        self.assertIn(b"Todo 0", everything)
+    
+    def test_errors_are_shared_and_not_remembered(self):
+        """Test that a failing leader fails its followers and is retried afterwards"""
+        flight = SingleFlight()
+        started, release = threading.Event(), threading.Event()
+        calls, errors = [], []
+        
+        def fail():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            raise ValueError('boom')
+        
+        def follower():
+            try:
+                flight.do('key', lambda: 'unused')
+            except ValueError as exc:
+                errors.append(exc)
+        
+        leader = threading.Thread(target=lambda: self.assertRaises(ValueError, flight.do, 'key', fail))
+        leader.start()
+        started.wait(5)
+        followers = [threading.Thread(target=follower) for _ in range(3)]
+        for thread in followers:
+            thread.start()
+        while flight.waiting('key') < 3:
+            time.sleep(0.001)
+        release.set()
+        for thread in [leader] + followers:
+            thread.join()
+        self.assertEqual((len(calls), len(errors)), (1, 3))
+        self.assertEqual(flight.do('key', lambda: 'fresh'), 'fresh')
+
+
+class RateLimitTest(TestCase):
+    """Test cases for the token-bucket rate limiter"""
+    
+    def test_token_bucket_refills_over_time(self):
+        """Test that a bucket allows a burst and then its refill rate"""
+        now = [0.0]
+        limiter = TokenBucketLimiter(rate=2, burst=3, clock=lambda: now[0])
+        self.assertEqual([limiter.take('a') for _ in range(3)], [0, 0, 0])
+        self.assertAlmostEqual(limiter.take('a'), 0.5)
+        self.assertEqual(limiter.take('b'), 0)
+        now[0] = 0.5
+        self.assertEqual(limiter.take('a'), 0)
+        self.assertGreater(limiter.take('a'), 0)
+    
+    def test_only_recent_clients_are_remembered(self):
+        """Test that the bucket table is bounded"""
+        limiter = TokenBucketLimiter(rate=1, burst=1, max_keys=2, clock=lambda: 0)
+        for key in 'abc':
+            limiter.take(key)
+        self.assertEqual(list(limiter._buckets), ['b', 'c'])
+    
+    @override_settings(TODO_RATE_LIMIT={'ENABLED': True, 'IP_RATE': 0.1, 'IP_BURST': 2, 'USER_RATE': 0.1, 'USER_BURST': 3})
+    def test_middleware_limits_per_ip_and_per_user(self):
+        """Test that clients get 429 with Retry-After once their bucket is empty"""
+        url = reverse('todo:todo_list')
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(self.client.get(url).status_code, 200)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '10')
+        self.assertEqual(self.client.get(url, REMOTE_ADDR='10.0.0.2').status_code, 200)
+        
+        from django.contrib.auth.models import User
+        self.client.force_login(User.objects.create_user('alice'))
+        statuses = [self.client.get(url).status_code for _ in range(4)]
+        self.assertEqual(statuses, [200, 200, 200, 429])
+    
+    @override_settings(TODO_RATE_LIMIT={'ENABLED': True, 'IP_RATE': 0.1, 'IP_BURST': 1, 'PROXY_COUNT': 1})
+    def test_client_address_behind_a_proxy(self):
+        """Test that the client address is read from X-Forwarded-For behind a proxy"""
+        url = reverse('todo:todo_list')
+        self.assertEqual(self.client.get(url, HTTP_X_FORWARDED_FOR='1.2.3.4').status_code, 200)
+        self.assertEqual(self.client.get(url, HTTP_X_FORWARDED_FOR='5.6.7.8').status_code, 200)
+        self.assertEqual(self.client.get(url, HTTP_X_FORWARDED_FOR='1.2.3.4').status_code, 429)
+
+
+class TodoHistoryTest(TestCase):
+    """Test cases for the append-only todo history"""
+    
+    def setUp(self):
+        self.todo = TodoItem.objects.create(title="Tracked")
+    
+    def test_add_and_edit_record_only_changed_fields(self):
+        """Test that history keeps the changed fields and who changed them"""
+        from django.contrib.auth.models import User
+        self.client.force_login(User.objects.create_user('alice'))
+        self.client.post(reverse('todo:add_todo'), {'title': 'New', 'priority': 3, 'tags': 'home'})
+        todo = TodoItem.objects.get(title='New')
+        created = todo.changes.get()
+        self.assertEqual(created.action, TodoChange.Action.CREATED)
+        self.assertEqual(created.changes, {'title': ['', 'New'], 'priority': [2, 3], 'tags': [[], ['home']]})
+        self.assertEqual(created.actor, 'alice')
+        
+        url = reverse('todo:edit_todo', args=[todo.pk])
+        self.client.post(url, {'title': 'Renamed', 'priority': 3, 'tags': 'home'})
+        self.client.post(url, {'title': 'Renamed', 'priority': 3, 'tags': 'home'})
+        updated = todo.changes.all()
+        self.assertEqual(len(updated), 2)
+        self.assertEqual(updated[0].changes, {'title': ['New', 'Renamed']})
+    
+    def test_history_is_written_in_the_same_transaction(self):
+        """Test that a failed history write rolls the edit back"""
+        with mock.patch.object(history, 'record', side_effect=RuntimeError('history down')):
+            with self.assertRaises(RuntimeError):
+                self.client.post(reverse('todo:edit_todo', args=[self.todo.pk]), {'title': 'Lost'})
+        self.assertEqual(TodoItem.objects.get(pk=self.todo.pk).title, "Tracked")
+    
+    def test_delete_and_restore_record_every_todo_in_the_subtree(self):
+        """Test that deleting and restoring a subtree is recorded for each todo"""
+        child = TodoItem.objects.create(title="Child", parent=self.todo)
+        self.client.post(reverse('todo:delete_todo', args=[self.todo.pk]))
+        self.client.post(reverse('todo:restore_todo', args=[self.todo.pk]))
+        for todo in (self.todo, child):
+            self.assertEqual(
+                [change.action for change in todo.changes.all()],
+                [TodoChange.Action.RESTORED, TodoChange.Action.DELETED]
+            )
+    
+    def test_bulk_operations_record_history(self):
+        """Test that the scheduler and the importer record what they create"""
+        due = timezone.now() - timedelta(minutes=1)
+        recurring = TodoItem.objects.create(title="Repeats", due_at=due, recurrence='daily')
+        DueScheduler().materialize([recurring], timezone.now())
+        self.assertEqual(recurring.changes.get().changes, {'recurrence': ['daily', '']})
+        successor = TodoItem.objects.get(title="Repeats", recurrence='daily')
+        self.assertEqual(successor.changes.get().actor, 'scheduler')
+        
+        path = tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False, encoding='utf-8')
+        with path:
+            path.write('{"title": "Imported"}\n{"title": "Also imported"}\n')
+        self.addCleanup(os.remove, path.name)
+        import_todos(path.name, workers=1)
+        self.assertEqual(TodoChange.objects.filter(actor='import').count(), 2)
+    
+    def test_history_view_reads_through_the_item_index(self):
+        """Test the per-todo history page and its query plan"""
+        self.client.post(reverse('todo:edit_todo', args=[self.todo.pk]), {'title': 'Renamed'})
+        response = self.client.get(reverse('todo:todo_history', args=[self.todo.pk]))
+        self.assertContains(response, 'Renamed')
+        self.assertContains(response, 'Updated')
+        
+        queryset = self.todo.changes.all()
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn('todo_change_item_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+    
+    def test_compaction_merges_runs_of_old_updates(self):
+        """Test that old consecutive updates collapse into one entry"""
+        history.record([(self.todo.pk, TodoChange.Action.UPDATED, {'title': ['Tracked', 'A']})])
+        history.record([(self.todo.pk, TodoChange.Action.UPDATED, {'title': ['A', 'B'], 'completed': [False, True]})])
+        history.record([(self.todo.pk, TodoChange.Action.UPDATED, {'completed': [True, False]})])
+        history.record([(self.todo.pk, TodoChange.Action.UPDATED, {'title': ['B', 'C']})], actor='bob')
+        self.assertEqual(history.compact(timezone.now(), batch_size=2), 2)
+        self.assertEqual(
+            [(change.actor, change.changes) for change in self.todo.changes.all()],
+            [('bob', {'title': ['B', 'C']}), ('', {'title': ['Tracked', 'B']})]
+        )
+    
+    def test_dropping_expired_periods(self):
+        """Test that whole months past the retention window are dropped"""
+        history.record([(self.todo.pk, TodoChange.Action.UPDATED, {'title': ['A', 'B']})])
+        TodoChange.objects.update(period=200001)
+        history.record([(self.todo.pk, TodoChange.Action.UPDATED, {'title': ['B', 'C']})])
+        out = StringIO()
+        call_command('compact_todo_history', retention=12, stdout=out)
+        self.assertIn('dropped 1', out.getvalue())
+        self.assertEqual([change.changes for change in self.todo.changes.all()], [{'title': ['B', 'C']}])
+
+
+class ReadModelTest(TestCase):
+    """Test cases for rendering list cards from lightweight rows"""
+    
+    def setUp(self):
+        cache.clear()
+        self.long_description = ' '.join(f"word{i}" for i in range(200))
+        work = TodoList.objects.create(name="Work")
+        self.todo = TodoItem.objects.create(
+            title="Long", description=self.long_description, todo_list=work,
+            priority=TodoItem.Priority.URGENT, due_at=timezone.now(), recurrence=TodoItem.Recurrence.WEEKLY,
+        )
+        self.todo.tags.add(Tag.objects.create(name="errands"))
+        done = TodoItem.objects.create(title="Step one", parent=self.todo, completed=True)
+        TodoItem.objects.create(title="Step two", parent=done)
+        TodoItem.objects.create(title="Short", description="Just a few words")
+    
+    def test_rows_are_slotted_and_truncated_by_the_database(self):
+        """Test that rows carry only a database-cut excerpt of the description"""
+        with CaptureQueriesContext(connection) as queries:
+            rows = list(todo_rows(TodoItem.objects.roots().order_by('-created_at', '-id')))
+        self.assertEqual(len(queries), 1)
+        self.assertIn('SUBSTR', queries[0]['sql'].upper())
+        short, long = rows
+        self.assertIsInstance(long, TodoRow)
+        self.assertFalse(hasattr(long, '__dict__'))
+        self.assertEqual(short.description, "Just a few words")
+        self.assertEqual(long.description, self.long_description[:DESCRIPTION_EXCERPT_CHARS])
+        self.assertFalse(long.description_cut)
+        self.assertEqual((long.todo_list, long.get_priority_display(), str(long)), ("Work", "Urgent", "Long"))
+    
+    def test_rows_render_like_model_instances(self):
+        """Test that both read paths render the same cards"""
+        url = reverse('todo:todo_list')
+        with override_settings(TODO_LIST_ROWS=True):
+            rows = self.client.get(url)
+            streamed_rows = b''.join(self.client.get(reverse('todo:todo_list_all')).streaming_content)
+        with override_settings(TODO_LIST_ROWS=False):
+            instances = self.client.get(url)
+            streamed_instances = b''.join(self.client.get(reverse('todo:todo_list_all')).streaming_content)
+        self.assertIsInstance(rows.context['todos'][0], TodoRow)
+        self.assertIsInstance(instances.context['todos'][0], TodoItem)
+        self.assertEqual(rows.context['cards_html'], instances.context['cards_html'])
+        self.assertEqual(streamed_rows, streamed_instances)
+        self.assertContains(rows, 'errands')
+        self.assertContains(rows, '1/2 done')
+        self.assertContains(rows, 'word19 …')
+        self.assertNotContains(rows, 'word20')
+    
+    def test_short_excerpts_are_completed(self):
+        """Test that a few long words cut by the database render in full"""
+        words = ' '.join(f"{i}" * 60 for i in range(1, 8))
+        todo = TodoItem.objects.create(title="Long words", description=words)
+        row, = todo_rows(TodoItem.objects.filter(pk=todo.pk))
+        self.assertTrue(row.description_cut)
+        with self.assertNumQueries(1):
+            complete_descriptions([row, row])
+        self.assertEqual(row.description, words)
+        with override_settings(TODO_LIST_ROWS=True):
+            rows = self.client.get(reverse('todo:todo_list'))
+        with override_settings(TODO_LIST_ROWS=False):
+            instances = self.client.get(reverse('todo:todo_list'))
+        self.assertEqual(rows.context['cards_html'], instances.context['cards_html'])
+        self.assertContains(rows, '7' * 60)
+    
+    def test_row_iterable_survives_queryset_api(self):
+        """Test the private _iterable_class hook todo_rows relies on"""
+        rows = todo_rows(TodoItem.objects.order_by('path'))
+        for queryset in (rows, rows.filter(depth__gt=0), rows[1:], rows.using('default')):
+            self.assertIsInstance(list(queryset)[0], TodoRow)
+        self.assertIsInstance(next(rows.iterator(chunk_size=2)), TodoRow)
+        self.assertIsInstance(rows[0], TodoRow)
+        self.assertIsInstance(rows.first(), TodoRow)
@@ -0,0 +1,53 @@
+"""
+Helpers for rendering todo subtrees fetched by materialized path.
+
+Both functions take nodes in depth-first (path) order, as returned by
+``TodoItem.objects.subtree()`` and ``descendants_of()``, and work in a
+single pass without further queries.
+"""
+
+import copy
+
+
+def rollup(nodes):
+    """
+    Set ``subtask_count`` and ``subtasks_done`` on every node to the number
+    of its descendants and of its completed descendants.
+    """
+    by_pk = {node.pk: node for node in nodes}
+    for node in nodes:
+        node.subtask_count = node.subtasks_done = 0
+    for node in reversed(nodes):
+        parent = by_pk.get(node.parent_id)
+        if parent is not None:
+            parent.subtask_count += node.subtask_count + 1
+            parent.subtasks_done += node.subtasks_done + int(node.completed)
+    return nodes
+
+
+def attach_subtasks(roots, descendants):
+    """
+    Give each of ``roots`` a ``subtasks`` list of its descendants, each with
+    a ``level`` relative to the root, and completion rollups. ``roots``
+    may nest (a tag listing can hold a todo and its subtask); a node under
+    several of them is copied into each.
+    """
+    by_path = {root.path: root for root in roots}
+    lengths = sorted({len(path) for path in by_path})
+    for root in roots:
+        root.subtasks = []
+    for node in descendants:
+        attached = False
+        for length in lengths:
+            if length >= len(node.path):
+                break
+            root = by_path.get(node.path[:length])
+            if root is not None:
+                if attached:
+                    node = copy.copy(node)
+                node.level = node.depth - root.depth
+                root.subtasks.append(node)
+                attached = True
+    for root in roots:
+        rollup([root] + root.subtasks)
+    return roots
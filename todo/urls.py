@@ -6,7 +6,12 @@ app_name = 'todo'
 urlpatterns = [
     # Class-based views
     path('', views.TodoListView.as_view(), name='todo_list'),
+    path('cards/', views.TodoCardsView.as_view(), name='todo_cards'),
+    path('all/', views.TodoListStreamView.as_view(), name='todo_list_all'),
     path('add/', views.AddTodoView.as_view(), name='add_todo'),
     path('edit/<int:pk>/', views.EditTodoView.as_view(), name='edit_todo'),
     path('delete/<int:pk>/', views.DeleteTodoView.as_view(), name='delete_todo'),
+    path('history/<int:pk>/', views.TodoHistoryView.as_view(), name='todo_history'),
+    path('deleted/', views.DeletedTodoListView.as_view(), name='deleted_todos'),
+    path('restore/<int:pk>/', views.RestoreTodoView.as_view(), name='restore_todo'),
 ]
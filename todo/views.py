@@ -1,16 +1,239 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from urllib.parse import quote
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, prefetch_related_objects
+from django.http import Http404, HttpResponseRedirect, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
-from django.urls import reverse_lazy
-from django.views.generic import ListView, CreateView, UpdateView, DeleteView
+from django.template.loader import get_template, render_to_string
+from django.urls import reverse, reverse_lazy
+from django.utils.html import format_html
+from django.views.generic import View, ListView, CreateView, UpdateView, DeleteView
+from django.views.generic.list import MultipleObjectMixin
 from django.contrib import messages
-from .models import TodoItem
+from .models import Tag, TodoItem, TodoList, deletion_retention
+from .readmodel import attach_tags, complete_descriptions, todo_rows
+from .tags import invalidate_tag_counts, tag_counts
+from .tree import attach_subtasks
 from .forms import TodoItemForm
+from .batching import WriteBehindFull, get_write_behind_queue
+from .coalescing import SingleFlight
+from . import history, routers
 
-# Class-based views
-class TodoListView(ListView):
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+STREAM_MARKER = '<!-- todo-cards -->'
+
+list_flight = SingleFlight()
+
+
+def encode_cursor(todo):
+    """Keyset cursor for the (-created_at, -id) list ordering."""
+    return f'{(todo.created_at - _EPOCH) // _MICROSECOND}-{todo.pk}'
+
+
+def decode_cursor(cursor):
+    try:
+        micros, pk = cursor.split('-')
+        return _EPOCH + int(micros) * _MICROSECOND, int(pk)
+    except (AttributeError, ValueError):
+        raise Http404('Invalid cursor.')
+
+
+class LazyListMixin:
+    """
+    Render the first TODO_LIST_PAGE_SIZE top-level cards and point the page
+    at the fragment endpoint for the rest. Pages are fetched by keyset over
+    the (depth, -created_at, -id) index, so deep pages cost the same as the
+    first. Subtasks of a page are loaded with one query over their paths.
+
+    With ``?tag=`` the page lists every todo with that tag, subtasks
+    included, keyed on the (tag, -created_at, -item) index of the tag links.
+
+    With TODO_LIST_ROWS the cards are rendered from lightweight TodoRow
+    objects (see readmodel.py) instead of model instances.
+    """
     model = TodoItem
-    template_name = 'todo/todo_list.html'
     context_object_name = 'todos'
-    ordering = ['-created_at']
+    ordering = ['-created_at', '-id']
+
+    def get_page_size(self):
+        return getattr(settings, 'TODO_LIST_PAGE_SIZE', None)
+
+    def use_rows(self):
+        return getattr(settings, 'TODO_LIST_ROWS', False)
+
+    def get_todo_list(self):
+        list_id = self.request.GET.get('list')
+        if not list_id:
+            return None
+        try:
+            return TodoList.objects.get(pk=list_id)
+        except (TodoList.DoesNotExist, ValueError):
+            raise Http404('No such list.')
+
+    def get_tag(self):
+        name = self.request.GET.get('tag')
+        if not name:
+            return None
+        try:
+            return Tag.objects.get(name=name)
+        except Tag.DoesNotExist:
+            raise Http404('No such tag.')
+
+    def get_filter_query(self):
+        """This page's list and tag filters as a query string."""
+        query = []
+        if self.todo_list is not None:
+            query.append('list=%d' % self.todo_list.pk)
+        if self.tag is not None:
+            query.append('tag=%s' % quote(self.tag.name))
+        return '&'.join(query)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if not self.use_rows():
+            queryset = queryset.select_related('todo_list').prefetch_related('tags')
+        self.todo_list = self.get_todo_list()
+        self.tag = self.get_tag()
+        if self.tag is None:
+            queryset = queryset.roots()
+            conditions, created_field, pk_field = Q(), 'created_at', 'pk'
+        else:
+            # Every condition on the link goes into one filter() call so that
+            # they share a single join.
+            conditions = Q(tag_links__tag=self.tag)
+            created_field, pk_field = 'tag_links__created_at', 'tag_links__item_id'
+            queryset = queryset.order_by('-' + created_field, '-' + pk_field)
+        if self.todo_list is not None:
+            conditions &= Q(todo_list=self.todo_list)
+        after = self.request.GET.get('after')
+        if after:
+            created_at, pk = decode_cursor(after)
+            conditions &= (
+                Q(**{created_field + '__lt': created_at})
+                | Q(**{created_field: created_at, pk_field + '__lt': pk})
+            )
+        queryset = queryset.filter(conditions)
+        if self.use_rows():
+            queryset = todo_rows(queryset)
+        page_size = self.get_page_size()
+        return queryset[:page_size] if page_size else queryset
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        todos = context['todos']
+        page_size = self.get_page_size()
+        if page_size or self.tag is not None:
+            descendants = TodoItem.objects.descendants_of(todos)
+        else:
+            descendants = TodoItem.objects.filter(depth__gt=0).order_by('path')
+        if self.use_rows():
+            attach_tags(complete_descriptions(list(todos)))
+            descendants = todo_rows(descendants)
+        attach_subtasks(list(todos), descendants)
+        context['filter_query'] = self.get_filter_query()
+        if page_size and len(todos) == page_size:
+            query = 'after=%s' % encode_cursor(todos[page_size - 1])
+            if context['filter_query']:
+                query += '&' + context['filter_query']
+            context['next_page_url'] = '%s?%s' % (reverse('todo:todo_cards'), query)
+        context['current_list'] = self.todo_list
+        context['current_tag'] = self.tag
+        return context
+
+
+# Class-based views
+class TodoListView(LazyListMixin, ListView):
+    """
+    Concurrent identical GETs are coalesced when TODO_COALESCE_LIST_REQUESTS
+    is set: one of them queries the database and renders the cards, and the
+    rest share that result and only render the page around it.
+    """
+    template_name = 'todo/todo_list.html'
+
+    def get(self, request, *args, **kwargs):
+        if not getattr(settings, 'TODO_COALESCE_LIST_REQUESTS', False):
+            return super().get(request, *args, **kwargs)
+        # Requests pinned to the primary must not share a replica read.
+        key = (request.get_full_path(), routers.is_pinned())
+        shared = list_flight.do(key, self.get_shared_context)
+        self.object_list = shared['todos']
+        return self.render_to_response(dict(shared, view=self))
+
+    def get_shared_context(self):
+        """Everything that does not depend on the request, with cards rendered."""
+        self.object_list = self.get_queryset()
+        context = self.get_context_data()
+        del context['view']
+        # Followers only read the already-fetched results.
+        len(context['todos'])
+        context['cards_html'] = render_to_string('todo/todo_cards.html', context)
+        return context
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['todo_lists'] = list(TodoList.objects.all())
+        context['tag_counts'] = tag_counts()
+        return context
+
+
+class TodoCardsView(LazyListMixin, ListView):
+    """HTML fragment with the next page of cards, for infinite scroll."""
+    template_name = 'todo/todo_cards.html'
+
+
+class TodoListStreamView(LazyListMixin, MultipleObjectMixin, View):
+    """
+    No-JS fallback listing every todo, with the same ``?list=`` and
+    ``?tag=`` filters as the list page. The page shell is sent first and
+    cards follow as they are read from the database cursor, so the browser
+    can paint before the whole queryset has been fetched.
+    """
+    chunk_size = 200
+
+    def get_page_size(self):
+        return None
+
+    def get(self, request):
+        queryset = self.get_queryset()
+        context = {'current_list': self.todo_list, 'current_tag': self.tag}
+        if not queryset.exists():
+            return render(request, 'todo/todo_list.html', dict(context, todos=[]))
+        shell = render_to_string('todo/todo_list.html', dict(context, streaming=True), request)
+        head, tail = shell.split(STREAM_MARKER, 1)
+        return StreamingHttpResponse(self.stream(head, queryset, tail, routers.is_pinned()))
+
+    def stream(self, head, queryset, tail, pinned=True):
+        # The cards are read after ReplicaPinningMiddleware has returned, so
+        # carry the request's routing over and reset it once done.
+        if not pinned:
+            routers.unpin()
+        try:
+            yield head
+            chunk = []
+            for todo in queryset.iterator(chunk_size=self.chunk_size):
+                chunk.append(todo)
+                if len(chunk) == self.chunk_size:
+                    yield self.render_cards(chunk)
+                    chunk = []
+            yield self.render_cards(chunk)
+            yield tail
+        finally:
+            routers.pin_to_primary()
+
+    def render_cards(self, todos):
+        card = get_template('todo/todo_card.html')
+        descendants = TodoItem.objects.descendants_of(todos)
+        if self.use_rows():
+            attach_tags(complete_descriptions(todos))
+            descendants = todo_rows(descendants)
+        else:
+            prefetch_related_objects(todos, 'tags')
+        attach_subtasks(todos, descendants)
+        return ''.join(card.render({'todo': todo, 'current_list': self.todo_list}) for todo in todos)
 
 class AddTodoView(CreateView):
     model = TodoItem
@@ -18,9 +241,40 @@ class AddTodoView(CreateView):
     template_name = 'todo/add_todo.html'
     success_url = reverse_lazy('todo:todo_list')
     
+    def get_initial(self):
+        initial = super().get_initial()
+        parent_id = self.request.GET.get('parent')
+        if parent_id:
+            parent = get_object_or_404(TodoItem, pk=parent_id)
+            initial.update(parent=parent, todo_list=parent.todo_list_id)
+        return initial
+    
     def form_valid(self, form):
-        messages.success(self.request, 'Todo item created successfully!')
-        return super().form_valid(form)
+        write_behind = get_write_behind_queue()
+        # Tag links need the todo's primary key, so tagged todos are saved
+        # directly.
+        if write_behind is None or form.cleaned_data['tags']:
+            with transaction.atomic():
+                response = super().form_valid(form)
+                history.record_form(form, history.actor_of(self.request), created=True)
+            messages.success(self.request, 'Todo item created successfully!', fail_silently=True)
+            return response
+        # Write-behind mode: hand the instance to the batching queue instead
+        # of inserting it in this request's own transaction. The queue
+        # records its history when it writes the batch.
+        todo = form.save(commit=False)
+        todo.history_actor = history.actor_of(self.request)
+        try:
+            write_behind.submit(todo)
+        except WriteBehindFull:
+            messages.error(self.request, 'Too many pending todos, please try again shortly.', fail_silently=True)
+            response = self.render_to_response(self.get_context_data(form=form), status=503)
+            response['Retry-After'] = '1'
+            return response
+        messages.success(self.request, 'Todo item created successfully!', fail_silently=True)
+        # The todo is not saved yet, so self.object stays None and the
+        # success URL cannot be formatted from it.
+        return HttpResponseRedirect(self.success_url)
 
 class EditTodoView(UpdateView):
     model = TodoItem
@@ -29,18 +283,77 @@ class EditTodoView(UpdateView):
     success_url = reverse_lazy('todo:todo_list')
     
     def form_valid(self, form):
-        messages.success(self.request, 'Todo item updated successfully!')
-        return super().form_valid(form)
+        with transaction.atomic():
+            response = super().form_valid(form)
+            history.record_form(form, history.actor_of(self.request))
+        messages.success(self.request, 'Todo item updated successfully!', fail_silently=True)
+        return response
 
 class DeleteTodoView(DeleteView):
+    """
+    Soft-delete a todo and its subtasks with a single UPDATE. They can be
+    restored from the recently deleted page until purge_todos removes them.
+    """
     model = TodoItem
     template_name = 'todo/delete_todo.html'
     success_url = reverse_lazy('todo:todo_list')
     context_object_name = 'todo'
     
-    def delete(self, request, *args, **kwargs):
-        messages.success(request, 'Todo item deleted successfully!')
-        return super().delete(request, *args, **kwargs)
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['retention_days'] = deletion_retention().days
+        return context
+    
+    def form_valid(self, form):
+        with transaction.atomic():
+            self.object.soft_delete()
+            history.record_deleted(self.object.deleted_at, history.actor_of(self.request), item=self.object)
+        invalidate_tag_counts()
+        messages.success(self.request, format_html(
+            'Todo item deleted successfully! <a href="{}" class="alert-link">Undo</a>',
+            reverse('todo:deleted_todos'),
+        ), fail_silently=True)
+        return HttpResponseRedirect(self.get_success_url())
+
+class DeletedTodoListView(ListView):
+    """Todos deleted within the retention window, newest first."""
+    template_name = 'todo/deleted_todos.html'
+    context_object_name = 'todos'
+    
+    def get_queryset(self):
+        return TodoItem.all_objects.restorable().select_related('todo_list').order_by('-deleted_at', '-id')
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['retention_days'] = deletion_retention().days
+        return context
+
+class RestoreTodoView(View):
+    """Undo a deletion, bringing back the subtasks deleted with the todo."""
+    
+    def post(self, request, pk):
+        todo = get_object_or_404(TodoItem.all_objects.restorable(), pk=pk)
+        with transaction.atomic():
+            history.record_restored(todo, history.actor_of(request))
+            todo.restore()
+        invalidate_tag_counts()
+        messages.success(request, 'Todo item restored successfully!', fail_silently=True)
+        return redirect('todo:todo_list')
+
+class TodoHistoryView(ListView):
+    """A todo's changes, newest first, read through the (item, -id) index."""
+    template_name = 'todo/todo_history.html'
+    context_object_name = 'changes'
+    paginate_by = 50
+    
+    def get_queryset(self):
+        self.todo = get_object_or_404(TodoItem.all_objects, pk=self.kwargs['pk'])
+        return self.todo.changes.all()
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['todo'] = self.todo
+        return context
 
 # Alternative function-based views if you prefer:
 def todo_list(request):
@@ -51,8 +364,10 @@ def add_todo(request):
     if request.method == 'POST':
         form = TodoItemForm(request.POST)
         if form.is_valid():
-            form.save()
-            messages.success(request, 'Todo item created successfully!')
+            with transaction.atomic():
+                form.save()
+                history.record_form(form, history.actor_of(request), created=True)
+            messages.success(request, 'Todo item created successfully!', fail_silently=True)
             return redirect('todo_list')
     else:
         form = TodoItemForm()
@@ -63,8 +378,10 @@ def edit_todo(request, pk):
     if request.method == 'POST':
         form = TodoItemForm(request.POST, instance=todo)
         if form.is_valid():
-            form.save()
-            messages.success(request, 'Todo item updated successfully!')
+            with transaction.atomic():
+                form.save()
+                history.record_form(form, history.actor_of(request))
+            messages.success(request, 'Todo item updated successfully!', fail_silently=True)
             return redirect('todo_list')
     else:
         form = TodoItemForm(instance=todo)
@@ -73,7 +390,10 @@ def edit_todo(request, pk):
 def delete_todo(request, pk):
     todo = get_object_or_404(TodoItem, pk=pk)
     if request.method == 'POST':
-        todo.delete()
-        messages.success(request, 'Todo item deleted successfully!')
+        with transaction.atomic():
+            todo.soft_delete()
+            history.record_deleted(todo.deleted_at, history.actor_of(request), item=todo)
+        invalidate_tag_counts()
+        messages.success(request, 'Todo item deleted successfully!', fail_silently=True)
         return redirect('todo_list')
-    return render(request, 'todo/delete_todo.html', {'todo': todo})
+    return render(request, 'todo/delete_todo.html', {'todo': todo, 'retention_days': deletion_retention().days})
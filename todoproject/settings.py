@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -42,10 +43,14 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'todo.middleware.CompressionMiddleware',
+    'todo.middleware.HtmlMinifyMiddleware',
+    'todo.middleware.ReplicaPinningMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'todo.middleware.RateLimitMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -80,6 +85,28 @@ DATABASES = {
     }
 }
 
+# Read replicas
+# TODO_REPLICA_DATABASES is a comma-separated list of SQLite files acting as
+# read replicas of the default database, e.g. "replica.sqlite3". Reads are
+# routed to a replica unless the request is pinned to the primary: unsafe
+# requests, anything after a write, and REPLICA_PIN_SECONDS after a client's
+# last write (read-your-writes).
+
+REPLICA_DATABASES = []
+
+for index, name in enumerate(filter(None, os.environ.get('TODO_REPLICA_DATABASES', '').split(',')), start=1):
+    alias = f'replica{index}'
+    DATABASES[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / name.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ['todo.routers.PrimaryReplicaRouter']
+
+REPLICA_PIN_SECONDS = 5
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -121,3 +148,94 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Write-behind batching for AddTodoView
+# When enabled, created todos are buffered in-process and inserted with
+# bulk_create every BATCH_SIZE items or FLUSH_INTERVAL_MS milliseconds.
+# Submitters block for up to PUT_TIMEOUT seconds once MAX_PENDING items are
+# waiting, after which the view answers 503.
+
+TODO_WRITE_BEHIND = {
+    'ENABLED': False,
+    'BATCH_SIZE': 100,
+    'FLUSH_INTERVAL_MS': 50,
+    'MAX_PENDING': 10000,
+    'PUT_TIMEOUT': 1.0,
+}
+
+
+# Response pipeline
+# HTML responses are whitespace-minified, then compressed with brotli (when
+# the optional Brotli package is installed) or gzip, whichever the client
+# prefers. Non-streaming responses below MIN_SIZE bytes are left alone.
+
+TODO_MINIFY_HTML = True
+
+TODO_RESPONSE_COMPRESSION = {
+    'ENABLED': True,
+    'MIN_SIZE': 1024,
+    'ENCODINGS': ['br', 'gzip'],
+    'BROTLI_QUALITY': 5,
+}
+
+
+# Todo list rendering
+# The list page renders the first TODO_LIST_PAGE_SIZE cards and loads the
+# rest from the fragment endpoint as the user scrolls; /all/ streams every
+# card for browsers without JavaScript. None renders everything at once.
+
+TODO_LIST_PAGE_SIZE = 30
+
+# Render list cards from lightweight rows read with values_list, with the
+# description cut short by the database, instead of full model instances.
+TODO_LIST_ROWS = True
+
+# Coalesce concurrent identical GETs of the list page into one database
+# read and render, shared by every request in the burst.
+TODO_COALESCE_LIST_REQUESTS = True
+
+# Seconds the tag-count sidebar is cached for. Tagging or untagging a todo
+# clears it straight away.
+TODO_TAG_COUNTS_TIMEOUT = 60
+
+# Soft delete
+# Deleted todos stay restorable for RETENTION_DAYS. `manage.py purge_todos`
+# then removes them PURGE_BATCH_SIZE rows per transaction, sleeping
+# PURGE_PAUSE_MS between transactions to let other writers in.
+
+TODO_SOFT_DELETE = {
+    'RETENTION_DAYS': 7,
+    'PURGE_BATCH_SIZE': 500,
+    'PURGE_PAUSE_MS': 50,
+}
+
+
+# Rate limiting
+# Token buckets refilling at *_RATE requests per second and holding up to
+# *_BURST. Authenticated users are limited per user and anonymous clients
+# per IP. Set PROXY_COUNT to the number of reverse proxies that append to
+# X-Forwarded-For so the client address is taken from there; behind the
+# bundled nginx that is 1, otherwise every client shares nginx's bucket.
+
+TODO_RATE_LIMIT = {
+    'ENABLED': False,
+    'IP_RATE': 20,
+    'IP_BURST': 100,
+    'USER_RATE': 20,
+    'USER_BURST': 100,
+    'PROXY_COUNT': 0,
+    'MAX_CLIENTS': 10000,
+}
+
+# Todo history
+# Every change to a todo is appended to its history, keeping only the fields
+# that changed. `manage.py compact_todo_history` merges runs of updates older
+# than COMPACT_AFTER_DAYS and drops months older than RETENTION_MONTHS,
+# BATCH_SIZE rows per transaction.
+
+TODO_HISTORY = {
+    'COMPACT_AFTER_DAYS': 30,
+    'RETENTION_MONTHS': 24,
+    'BATCH_SIZE': 1000,
+}
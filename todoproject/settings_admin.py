@@ -0,0 +1,21 @@
+"""
+Settings profile for processes serving only the Django admin.
+
+Use with DJANGO_SETTINGS_MODULE=todoproject.settings_admin.
+"""
+
+from .settings import *  # noqa: F401,F403
+
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'todo.middleware.CompressionMiddleware',
+    'todo.middleware.ReplicaPinningMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ROOT_URLCONF = 'todoproject.urls_admin'
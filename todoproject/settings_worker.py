@@ -0,0 +1,28 @@
+"""
+Settings profile for background workers and management commands.
+
+Loads only the todo app and what its models depend on, with no middleware
+or template context processors. Use with
+DJANGO_SETTINGS_MODULE=todoproject.settings_worker. Run ``migrate`` with
+the full settings, since the other profiles do not know about every table.
+"""
+
+from .settings import *  # noqa: F401,F403
+
+INSTALLED_APPS = [
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'todo',
+]
+
+MIDDLEWARE = []
+
+ROOT_URLCONF = 'todoproject.urls_api'
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [],
+        'APP_DIRS': True,
+    },
+]
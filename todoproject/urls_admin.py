@@ -0,0 +1,9 @@
+"""
+URL configuration for the admin-only settings profile.
+"""
+from django.contrib import admin
+from django.urls import path
+
+urlpatterns = [
+    path('admin/', admin.site.urls),
+]
@@ -0,0 +1,8 @@
+"""
+URL configuration for the API-only and worker settings profiles.
+"""
+from django.urls import path, include
+
+urlpatterns = [
+    path('', include('todo.urls')),
+]